@@ -1,17 +1,65 @@
 from math import inf
-from board import Board
-from auxiliary import Status, LSB1
+from time import perf_counter
+from board import CompactBoard, BOTTOM_MASK, BOARD_MASK, COLUMN_MASKS, winning_squares, \
+    non_losing_moves, column_mask, canonical_key, mirror_key
+from auxiliary import Status, LSB1, TT_Flag, WIN_THRESHOLD
+from transposition import TranspositionTable
+from book import probe_book
+from evaluation import IncrementalEvaluation
+from ordering import CentreOrdering, HistoryOrdering
+
+class SearchTimeout(Exception):
+    """Raised inside the search tree when the time or node budget runs out
+    """
+    pass
 
 class Minimax:
 
-    def __init__(self, position : list, max_depth : int):
-        self.board = Board()
+    ##Stored evaluations are from the ai's perspective,
+    ##so the transposition table is only valid while the ai plays the same side
+    relative_scores = False
+    ##Attributes learnt by a search that are kept for the next turn
+    search_state = ('move_ordering', 'principal_variation', 'ai_board_index')
+
+    def __init__(self, position : list, max_depth : int,
+            transposition_table : TranspositionTable = None, book_database : str = None,
+            move_ordering : CentreOrdering = None, tablebase = None):
+        ##Board keeps the evaluation up to date as moves are made
+        self.board = CompactBoard(IncrementalEvaluation())
         self.max_search_depth = max_depth
         self.initialise_position(position)
 
+        ##Database holding the opening book, not consulted if None
+        self.book_database = book_database
+
+        ##Exact scores of late positions, from tablebase.load_tablebase, not probed if None
+        self.tablebase = tablebase
+
+        ##Shared between searches if passed in
+        if transposition_table is None:
+            transposition_table = TranspositionTable()
+        self.transposition_table = transposition_table
+
+        ##Killer and history tables, shared between turns if passed in
+        if move_ordering is None:
+            move_ordering = HistoryOrdering()
+        self.move_ordering = move_ordering
+
         ##Index of ai's bitboard in board._bitboards
         self.ai_board_index = self.board.get_counter() & 1
 
+        ##Moves played before the root of the search, win scores are stored relative to it
+        self.root_counter = self.board.get_counter()
+
+        ##Search budget, only set during iterative_search
+        self.nodes = 0
+        self.deadline = None
+        self.node_limit = None
+        self.completed_depth = -1
+        self.stop_event = None ##threading.Event another thread can set to stop the search
+
+        ##Expected line from the last completed iteration, starting with the ai's move
+        self.principal_variation = []
 
     def initialise_position(self, position : list):
         """Loads the board instance with starting position for search
@@ -22,6 +70,90 @@ class Minimax:
         for move in position:
             self.board.make_move(move)
 
+    def play_move(self, move : int):
+        """Plays a move made in the game, so one engine can be kept for a whole game
+        Search tables are kept, and the principal variation is followed while it is played
+
+        Args:
+            move (int): Column of the move
+        """
+        self.board.make_move(move)
+        if self.principal_variation[:1] == [move]:
+            self.principal_variation = self.principal_variation[1:]
+        else:
+            self.principal_variation = []
+
+    def set_position(self, position : list):
+        """Brings the board to a position, only undoing moves that differ from it
+        and playing the moves after them
+
+        Args:
+            position (list): Moves representing position
+        """
+        history = self.board.get_move_history()
+        shared = 0
+        while shared < min(len(history), len(position)) and history[shared] == position[shared]:
+            shared += 1
+        if self.board.get_counter() > shared:
+            self.principal_variation = []
+            while self.board.get_counter() > shared:
+                self.board.undo_move()
+        for move in position[shared:]:
+            self.play_move(move)
+
+    def start_search(self):
+        """Prepares the engine's tables for a search from the current position
+        """
+        ai_board_index = self.board.get_counter() & 1
+        if ai_board_index != self.ai_board_index:
+            ##Ai is now playing the other side
+            self.ai_board_index = ai_board_index
+            if not self.relative_scores:
+                self.transposition_table.clear()
+        self.transposition_table.new_search()
+        self.move_ordering.new_search()
+
+    def get_search_state(self) -> dict:
+        """Gets the attributes learnt by searching, to return them from another process
+
+        Returns:
+            dict: Values of the attributes in search_state
+        """
+        return {name : getattr(self, name) for name in self.search_state}
+
+    def set_search_state(self, state : dict):
+        """Keeps the attributes learnt by a search in another process
+
+        Args:
+            state (dict): Values from get_search_state
+        """
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def principal_variation_from(self, best_move : int) -> list:
+        """Follows the best moves stored in the transposition table from the root
+
+        Args:
+            best_move (int): Best root move of the last completed iteration
+
+        Returns:
+            list: Expected line of play, starting with best_move
+        """
+        line = [best_move]
+        self.board.make_move(best_move)
+        while len(line) <= self.completed_depth and self.board.game_over() == Status.game_unfinished:
+            key, mirrored = self.board.get_canonical_key()
+            entry = self.transposition_table.probe(key)
+            if entry is None:
+                break
+            move = 6 - entry[3] if mirrored else entry[3]
+            if move not in self.board.retrieve_valid_moves():
+                break
+            line.append(move)
+            self.board.make_move(move)
+        for move in line:
+            self.board.undo_move()
+        return line
 
     def search(self) -> int:
         """Calls minimax with initial conditions
@@ -29,22 +161,151 @@ class Minimax:
         Returns:
             int: Best move in initial position
         """
+        book_move = self.book_move()
+        if book_move is not None:
+            return book_move
+
+        self.start_search()
+        ordered_moves = self.naive_move_sort(self.root_moves())
+        best_move, move_evals = self.search_root(ordered_moves)
+        return best_move
+
+    def iterative_search(self, time_limit : float = None, node_limit : int = None,
+            start_depth : int = 0, progress = None) -> int:
+        """Searches to increasing depths until the budget runs out
+        Each completed iteration orders the root moves for the next,
+        and leaves its best moves in the transposition table
+        The deepest completed depth is left in completed_depth
+
+        Args:
+            time_limit (float, optional): Wall-clock budget in seconds
+            node_limit (int, optional): Budget of nodes searched
+            start_depth (int, optional): Depth of the first iteration
+            progress (function, optional): Called with the depth, best move and
+                evaluation after each completed iteration
+
+        Returns:
+            int: Best move from the deepest completed iteration
+        """
+        book_move = self.book_move()
+        if book_move is not None:
+            return book_move
+
+        self.start_search()
+        self.nodes = 0
+        self.node_limit = node_limit
+        if time_limit is not None:
+            self.deadline = perf_counter() + time_limit
+
+        final_depth = self.max_search_depth
+        ##No need to search past the end of the game
+        full_depth = 41 - self.board.get_counter()
+        ordered_moves = self.naive_move_sort(self.root_moves())
+        ##Move expected by the last turn's search is tried first
+        if self.principal_variation and self.principal_variation[0] in ordered_moves:
+            ordered_moves.remove(self.principal_variation[0])
+            ordered_moves.insert(0, self.principal_variation[0])
+        best_move = ordered_moves[0] ##Fallback if no iteration completes
+        self.completed_depth = -1
+        try:
+            for depth in range(start_depth, min(final_depth, full_depth) + 1):
+                self.max_search_depth = depth
+                best_move, move_evals = self.search_root(ordered_moves)
+                self.completed_depth = depth
+                self.principal_variation = self.principal_variation_from(best_move)
+                if progress is not None:
+                    progress(depth, best_move, move_evals[best_move])
+                ordered_moves = self.reorder_root_moves(ordered_moves, best_move, move_evals)
+        except SearchTimeout:
+            ##Abandoned iteration leaves moves on the board
+            while self.board.get_counter() > self.root_counter:
+                self.board.undo_move()
+        finally:
+            self.max_search_depth = final_depth
+            self.deadline = None
+            self.node_limit = None
+        return best_move
+
+    def reorder_root_moves(self, ordered_moves : list, best_move : int, move_evals : dict) -> list:
+        """Orders the root moves for the next iteration by the last one's evaluations
+
+        Args:
+            ordered_moves (list): Root moves in the order they were searched
+            best_move (int): Best move of the iteration
+            move_evals (dict): Evaluations of the iteration
+
+        Returns:
+            list: Root moves with the best first
+        """
+        ##Stable sort, so centre distance still breaks ties
+        ordered_moves = sorted(ordered_moves, key = lambda x : -move_evals[x])
+        ordered_moves.remove(best_move)
+        ordered_moves.insert(0, best_move)
+        return ordered_moves
+
+    def book_move(self) -> int:
+        """Looks up the initial position in the opening book
+
+        Returns:
+            int: Book move, or None if there is no book or the position is not in it
+        """
+        if self.book_database is None:
+            return None
+        return probe_book(self.board, self.book_database)
+
+    def search_root(self, ordered_moves : list) -> tuple:
+        """Searches each root move in order
+
+        Args:
+            ordered_moves (list): Root moves in the order to search them
+
+        Returns:
+            tuple: Best move and a dictionary of evaluations for each move,
+                evaluations other than the best are upper bounds
+        """
         best_move = -1 ##Will be changed
         best_eval = - inf ##lowest possible evaluation
+        move_evals = {}
+        self.root_counter = self.board.get_counter()
 
-        valid_moves = self.board.retrieve_valid_moves()
-        ordered_moves = self.naive_move_sort(valid_moves)
         for move in ordered_moves:
             ##Generate and search game tree
-            self.board.make_move(move)
-            move_eval = self.minimax(0, -inf, inf, False)
-            self.board.undo_move()
+            move_eval = self.search_move(move, best_eval)
+            move_evals[move] = move_eval
 
             ##Update best move and evaluation
             if move_eval > best_eval:
                 best_eval = move_eval
                 best_move = move
-        return best_move
+        return best_move, move_evals
+
+    def search_move(self, move : int, alpha : int) -> int:
+        """Searches a single root move
+
+        Args:
+            move (int): Root move to search
+            alpha (int): Best evaluation already found at the root
+
+        Returns:
+            int: Evaluation of the move, an upper bound if not above alpha
+        """
+        self.board.make_move(move)
+        move_eval = self.minimax(0, alpha, inf, False)
+        self.board.undo_move()
+        return move_eval
+
+    def check_budget(self):
+        """Stops the search if the time or node budget has run out
+
+        Raises:
+            SearchTimeout: Budget exceeded or search stopped
+        """
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchTimeout()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout()
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            raise SearchTimeout()
 
     def minimax(self, depth : int, alpha : int, beta : int, is_max : bool):
         """Minimax search of game tree
@@ -58,6 +319,11 @@ class Minimax:
         Returns:
             int: Best evaluated move in position
         """
+        ##Only check the clock every 1024 nodes
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.check_budget()
+
         ##Check for a terminal board position
         status = self.board.game_over()
         if status == Status.game_drawn:
@@ -71,11 +337,37 @@ class Minimax:
                 return -10000 + depth
             else:
                 return 10000 - depth
-        elif depth == self.max_search_depth:
+
+        ##Exact result for a late position, cutting off the whole subtree
+        tablebase_eval = self.probe_tablebase(depth)
+        if tablebase_eval is not None:
+            return tablebase_eval if is_max else -tablebase_eval
+
+        if depth == self.max_search_depth:
             return self.evaluate()
         else:
-            valid_moves = self.board.retrieve_valid_moves()
-            ordered_moves = self.naive_move_sort(valid_moves)
+            ##Take an immediate win without searching further
+            if self.board.can_win_next():
+                if is_max:
+                    return 10000 - (depth+1)
+                else:
+                    return -10000 + (depth+1)
+            ##Only search moves that do not hand the opponent a win
+            non_losing = self.board.get_non_losing()
+            if non_losing == 0:
+                if is_max:
+                    return -10000 + (depth+2)
+                else:
+                    return 10000 - (depth+2)
+
+            remaining = self.max_search_depth - depth
+            original_alpha, original_beta = alpha, beta
+            tt_eval, alpha, beta, key, mirrored, tt_move = self.probe_table(remaining, alpha, beta)
+            if tt_eval is not None:
+                return tt_eval
+
+            ordered_moves = self.order_moves(tt_move, non_losing)
+            best_move = ordered_moves[0]
 
             ##Maximising player - AI
             if is_max:
@@ -83,11 +375,15 @@ class Minimax:
                 ##Search all available moves
                 for move in ordered_moves:
                     self.board.make_move(move)
-                    best_eval = max(best_eval, self.minimax(depth+1, alpha, beta, False))
+                    move_eval = self.minimax(depth+1, alpha, beta, False)
                     self.board.undo_move()
+                    if move_eval > best_eval:
+                        best_eval = move_eval
+                        best_move = move
 
                     ##Prune search tree
                     if best_eval >= beta:
+                        self.move_ordering.record_cutoff(self.board, move, remaining)
                         break
                     alpha = max(best_eval, alpha)
             ##Minimising player - human
@@ -96,15 +392,147 @@ class Minimax:
                 ##Search all available moves
                 for move in ordered_moves:
                     self.board.make_move(move)
-                    best_eval = min(best_eval, self.minimax(depth+1, alpha, beta, True))
+                    move_eval = self.minimax(depth+1, alpha, beta, True)
                     self.board.undo_move()
+                    if move_eval < best_eval:
+                        best_eval = move_eval
+                        best_move = move
 
                     ##Prune search tree
                     if best_eval <= alpha:
+                        self.move_ordering.record_cutoff(self.board, move, remaining)
                         break
                     beta = min(beta, best_eval)
+
+            self.store_result(key, best_eval, remaining, original_alpha, original_beta,
+                6 - best_move if mirrored else best_move)
             return best_eval
 
+    def probe_table(self, remaining : int, alpha : int, beta : int) -> tuple:
+        """Looks up the current position in the transposition table,
+        narrowing the search window by a stored bound
+
+        Args:
+            remaining (int): Depth to be searched below the position
+            alpha (int): Pruning lower bound
+            beta (int): Pruning upper bound
+
+        Returns:
+            tuple: Stored evaluation if it ends the search of the position, otherwise None,
+                then the narrowed alpha and beta, the position's canonical key,
+                whether the position is mirrored, and the stored best move or -1
+        """
+        ##Mirror images share an entry, its move is for the canonical orientation
+        key, mirrored = self.board.get_canonical_key()
+        entry = self.transposition_table.probe(key)
+        if entry is None:
+            return None, alpha, beta, key, mirrored, -1
+        tt_eval, tt_depth, tt_flag, tt_move = entry
+        tt_eval = self.value_from_table(tt_eval)
+        if mirrored:
+            tt_move = 6 - tt_move
+        if tt_depth >= remaining:
+            if tt_flag == TT_Flag.exact:
+                return tt_eval, alpha, beta, key, mirrored, tt_move
+            elif tt_flag == TT_Flag.lower:
+                alpha = max(alpha, tt_eval)
+            elif tt_flag == TT_Flag.upper:
+                beta = min(beta, tt_eval)
+            if alpha >= beta:
+                return tt_eval, alpha, beta, key, mirrored, tt_move
+        return None, alpha, beta, key, mirrored, tt_move
+
+    def probe_tablebase(self, depth : int) -> int:
+        """Looks up the current position in the tablebase,
+        converting its score to an evaluation at the depth the game would be won
+
+        Args:
+            depth (int): Current search depth
+
+        Returns:
+            int: Evaluation for the player to move, or None if there is no tablebase
+                or the position is not in it
+        """
+        if self.tablebase is None or self.board.get_counter() < self.tablebase.min_stones:
+            return None
+        score = self.tablebase.probe(self.board.get_canonical_key()[0])
+        if score is None or score == 0:
+            return score
+        counter = self.board.get_counter()
+        ##Stones before the winning stone, a score of 1 is a win with the winner's last stone
+        if score > 0:
+            winning_counter = 42 - 2*score + (counter & 1)
+            return 10000 - (depth + winning_counter + 1 - counter)
+        winning_counter = 42 + 2*score + ((counter + 1) & 1)
+        return -10000 + (depth + winning_counter + 1 - counter)
+
+    def order_moves(self, tt_move : int, allowed : int = BOARD_MASK) -> list:
+        """Orders the valid moves in the current position for searching
+
+        Args:
+            tt_move (int): Best move from the transposition table, -1 if none
+            allowed (int, optional): Bitboard of the moves to keep
+
+        Returns:
+            list: Ordered moves
+        """
+        valid_moves = [col for col in self.board.retrieve_valid_moves() if allowed & COLUMN_MASKS[col]]
+        return self.move_ordering.order(self.board, valid_moves, tt_move)
+
+    def store_result(self, key : int, best_eval : int, remaining : int,
+            alpha : int, beta : int, best_move : int):
+        """Stores the result of searching a node in the transposition table
+
+        Args:
+            key (int): Position key
+            best_eval (int): Evaluation returned by the node
+            remaining (int): Depth searched below the node
+            alpha (int): Original lower bound of the search window
+            beta (int): Original upper bound of the search window
+            best_move (int): Best move found
+        """
+        ##Values outside the original window are only bounds
+        if best_eval <= alpha:
+            flag = TT_Flag.upper
+        elif best_eval >= beta:
+            flag = TT_Flag.lower
+        else:
+            flag = TT_Flag.exact
+        self.transposition_table.store(key, self.value_to_table(best_eval), remaining, flag, best_move)
+
+    def value_to_table(self, value : int) -> int:
+        """Converts an evaluation for storing in the transposition table
+        Win scores count moves from the search root, so they are stored counting
+        from the start of the game instead, as the table is kept between searches
+        from different roots
+
+        Args:
+            value (int): Evaluation relative to the search root
+
+        Returns:
+            int: Value to store
+        """
+        if value > WIN_THRESHOLD:
+            return value - self.root_counter
+        if value < -WIN_THRESHOLD:
+            return value + self.root_counter
+        return value
+
+    def value_from_table(self, value : int) -> int:
+        """Converts a stored value back to an evaluation relative to the search root
+
+        Args:
+            value (int): Value from the transposition table
+
+        Returns:
+            int: Evaluation relative to the search root
+        """
+        if value > WIN_THRESHOLD:
+            return value + self.root_counter
+        if value < -WIN_THRESHOLD:
+            return value - self.root_counter
+        return value
+
     def evaluate(self):
         """Calls evaluation functions
 
@@ -112,38 +540,28 @@ class Minimax:
             int: Evaluation of position
         """
         if self.board.get_counter() > 10:
-            return self.feature_evaluation()
+            return self.window_evaluation()
         else:
             return self.static_evaluation()
 
     def static_evaluation(self) -> int:
-        """Calculates static evaluation of position
+        """Static evaluation of position, kept up to date by the board
         Positive is good for ai
 
         Returns:
             int: Static evaluation of position
         """
-        ##Fixed evaluation for position
-        eval_board = [
-            3,4,5,5,4,3,0,
-            4,6,8,8,6,4,0,
-            5,8,11,11,8,5,0,
-            7,10,13,13,10,7,0,
-            5,8,11,11,8,5,0,
-            4,6,8,8,6,4,0,
-            3,4,5,5,4,3,0,
-            0,0,0,0,0,0,0,
-            0,0,0,0,0,0,0,0
-        ]
-        score = 0
-        for i in range(64):
-            ##Move played by AI
-            if (self.board.get_bitboard(self.ai_board_index) & (LSB1 << i)) != 0:
-                score += eval_board[i]
-            ##Move played by opponent
-            elif (self.board.get_bitboard(1 - self.ai_board_index) & (LSB1 << i) != 0):
-                score -= eval_board[i]
-        return score
+        return self.board.get_evaluator().static_score(self.ai_board_index)
+
+    def window_evaluation(self) -> int:
+        """Evaluation from the winning windows still open to each player,
+        kept up to date by the board
+        Positive is good for ai
+
+        Returns:
+            int: Window evaluation of position
+        """
+        return self.board.get_evaluator().window_score(self.ai_board_index)
 
     def feature_evaluation(self) -> int:
         """Calculates feature-based evaluation of a position
@@ -203,6 +621,20 @@ class Minimax:
             n = n >> 1 ##Shift bits right
         return count
 
+    def root_moves(self) -> list:
+        """Valid moves at the root, leaving out mirror images of other moves
+        In a symmetric position a move and its mirror have the same evaluation,
+        so only the centre and columns left of it are searched
+
+        Returns:
+            list: Moves to search
+        """
+        valid_moves = self.board.retrieve_valid_moves()
+        key = self.board.get_key()
+        if mirror_key(key) == key:
+            return [col for col in valid_moves if col <= 3]
+        return list(valid_moves)
+
     def naive_move_sort(self, moves : list) -> list:
         """Sorts moves based on distance from centre
 
@@ -216,5 +648,367 @@ class Minimax:
         return sorted(moves, key = lambda x : abs(x-3))
 
 
+class Negamax(Minimax):
+    """Alternative engine using a negamax formulation of the same search
+    Evaluations inside the tree are relative to the player to move,
+    so one branch serves both players. Moves after the first are searched
+    with a null window (principal variation search), and each iteration
+    of iterative_search starts with an aspiration window around the last score
+    Uses its own transposition table, as stored values are not from the ai's perspective
+    """
+
+    aspiration_window = 100
+    relative_scores = True
+    search_state = Minimax.search_state + ('previous_eval',)
 
+    def __init__(self, position : list, max_depth : int,
+            transposition_table : TranspositionTable = None, book_database : str = None,
+            move_ordering : CentreOrdering = None, tablebase = None):
+        super().__init__(position, max_depth, transposition_table, book_database, move_ordering,
+            tablebase)
+        self.previous_eval = None ##Score of the last completed root search
 
+    def search_root(self, ordered_moves : list) -> tuple:
+        """Searches the root moves inside an aspiration window
+        Falls back to a full window if the score lands outside it
+
+        Args:
+            ordered_moves (list): Root moves in the order to search them
+
+        Returns:
+            tuple: Best move and a dictionary of evaluations for each move,
+                evaluations other than the best are bounds
+        """
+        self.root_counter = self.board.get_counter()
+        if self.previous_eval is None:
+            alpha, beta = -inf, inf
+        else:
+            alpha = self.previous_eval - self.aspiration_window
+            beta = self.previous_eval + self.aspiration_window
+
+        best_move, best_eval, move_evals = self.search_root_window(ordered_moves, alpha, beta)
+        if best_eval <= alpha or best_eval >= beta:
+            ##Aspiration failed, so the result is only a bound
+            best_move, best_eval, move_evals = self.search_root_window(ordered_moves, -inf, inf)
+        self.previous_eval = best_eval
+        return best_move, move_evals
+
+    def search_root_window(self, ordered_moves : list, alpha : int, beta : int) -> tuple:
+        """Principal variation search of the root moves
+
+        Args:
+            ordered_moves (list): Root moves in the order to search them
+            alpha (int): Lower bound of the window
+            beta (int): Upper bound of the window
+
+        Returns:
+            tuple: Best move, best evaluation and evaluations for each move searched
+        """
+        best_move = -1
+        best_eval = -inf
+        move_evals = {}
+        for i, move in enumerate(ordered_moves):
+            self.board.make_move(move)
+            move_eval = self.pv_search(0, alpha, beta, i == 0)
+            self.board.undo_move()
+            move_evals[move] = move_eval
+
+            if move_eval > best_eval:
+                best_eval = move_eval
+                best_move = move
+            alpha = max(alpha, best_eval)
+            if alpha >= beta:
+                break
+        return best_move, best_eval, move_evals
+
+    def search_move(self, move : int, alpha : int) -> int:
+        """Searches a single root move
+
+        Args:
+            move (int): Root move to search
+            alpha (int): Best evaluation already found at the root
+
+        Returns:
+            int: Evaluation of the move, an upper bound if not above alpha
+        """
+        self.board.make_move(move)
+        move_eval = -self.negamax(0, -inf, -alpha)
+        self.board.undo_move()
+        return move_eval
+
+    def pv_search(self, depth : int, alpha : int, beta : int, first : bool) -> int:
+        """Searches a child node, with a null window unless it is the first move
+
+        Args:
+            depth (int): Depth of the child node
+            alpha (int): Lower bound of the parent's window
+            beta (int): Upper bound of the parent's window
+            first (bool): Child is the first move searched from its parent
+
+        Returns:
+            int: Evaluation of the child from the parent's perspective
+        """
+        if first:
+            return -self.negamax(depth, -beta, -alpha)
+        ##Only prove the move is no better than alpha
+        move_eval = -self.negamax(depth, -alpha-1, -alpha)
+        if alpha < move_eval < beta:
+            ##Move may be better, so search again with the full window
+            move_eval = -self.negamax(depth, -beta, -alpha)
+        return move_eval
+
+    def negamax(self, depth : int, alpha : int, beta : int) -> int:
+        """Negamax search of game tree
+
+        Args:
+            depth (int): Current search depth
+            alpha (int): Pruning lower bound
+            beta (int): Pruning upper bound
+
+        Returns:
+            int: Evaluation of position for the player to move
+        """
+        ##Only check the clock every 1024 nodes
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.check_budget()
+
+        ##Check for a terminal board position
+        status = self.board.game_over()
+        if status == Status.game_drawn:
+            return 0
+        elif status == Status.game_won:
+            ##Player to move has lost, quick wins preferred as in Minimax
+            return -10000 + depth
+
+        ##Exact result for a late position, cutting off the whole subtree
+        tablebase_eval = self.probe_tablebase(depth)
+        if tablebase_eval is not None:
+            return tablebase_eval
+
+        if depth == self.max_search_depth:
+            ##Evaluation is from the ai's perspective
+            if self.board.get_counter() & 1 == self.ai_board_index:
+                return self.evaluate()
+            return -self.evaluate()
+
+        ##Take an immediate win, and only search moves that do not hand the opponent a win
+        if self.board.can_win_next():
+            return 10000 - (depth+1)
+        non_losing = self.board.get_non_losing()
+        if non_losing == 0:
+            return -10000 + (depth+2)
+
+        remaining = self.max_search_depth - depth
+        original_alpha, original_beta = alpha, beta
+        tt_eval, alpha, beta, key, mirrored, tt_move = self.probe_table(remaining, alpha, beta)
+        if tt_eval is not None:
+            return tt_eval
+
+        ordered_moves = self.order_moves(tt_move, non_losing)
+        best_move = ordered_moves[0]
+        best_eval = -inf
+        for i, move in enumerate(ordered_moves):
+            self.board.make_move(move)
+            move_eval = self.pv_search(depth+1, alpha, beta, i == 0)
+            self.board.undo_move()
+            if move_eval > best_eval:
+                best_eval = move_eval
+                best_move = move
+
+            ##Prune search tree
+            if best_eval >= beta:
+                self.move_ordering.record_cutoff(self.board, move, remaining)
+                break
+            alpha = max(best_eval, alpha)
+
+        self.store_result(key, best_eval, remaining, original_alpha, original_beta,
+            6 - best_move if mirrored else best_move)
+        return best_eval
+
+
+class Solver(Minimax):
+    """Exact solver, searching every line to the end of the game
+    Scores are from the perspective of the player to move:
+    0 for a draw, positive for a win, negative for a loss.
+    A win with the player's final stone scores 1, a win one stone
+    earlier scores 2 and so on, so quicker wins score higher
+    Works directly on (current player's stones, mask) integers using the
+    bitboard layout from board.py, and only searches null windows
+    """
+
+    ##Columns searched from the centre outwards
+    column_order = [3,2,4,1,5,0,6]
+
+    def __init__(self, position : list, transposition_table : TranspositionTable = None,
+            tablebase = None):
+        super().__init__(position, 42, transposition_table, tablebase = tablebase)
+
+    def search(self) -> int:
+        """Finds the move with the best exact score
+
+        Returns:
+            int: Best move in initial position
+        """
+        move_scores = self.analyse()
+        ##Dictionary is in centre-first order, so ties favour the centre
+        return max(move_scores, key = lambda x : move_scores[x])
+
+    def analyse(self) -> dict:
+        """Solves the position after each valid move
+
+        Returns:
+            dict: Exact score for each valid move, for the player to move
+        """
+        self.transposition_table.new_search()
+        counter = self.board.get_counter()
+        current = self.board.get_bitboard(counter & 1)
+        mask = self.board.get_mask()
+        win = winning_squares(current, mask)
+        move_scores = {}
+        for col in self.column_order:
+            if col not in self.board.retrieve_valid_moves():
+                continue
+            move = (mask + (LSB1 << 7*col)) & column_mask(col)
+            if move & win:
+                move_scores[col] = (43 - counter) // 2
+            else:
+                move_scores[col] = -self.solve_bitboards(current ^ mask, mask | move, counter + 1)
+        return move_scores
+
+    def solve(self) -> int:
+        """Solves the initial position
+
+        Returns:
+            int: Exact score of the position for the player to move
+        """
+        self.transposition_table.new_search()
+        counter = self.board.get_counter()
+        if self.board.game_over() == Status.game_won:
+            ##Previous player won with their last stone
+            return -((44 - counter) // 2)
+        current = self.board.get_bitboard(counter & 1)
+        return self.solve_bitboards(current, self.board.get_mask(), counter)
+
+    def solve_bitboards(self, current : int, mask : int, counter : int) -> int:
+        """Narrows the score down with null window searches
+
+        Args:
+            current (int): Stones of the player to move
+            mask (int): All stones
+            counter (int): Number of moves played
+
+        Returns:
+            int: Exact score of the position
+        """
+        if counter == 42:
+            return 0
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        if winning_squares(current, mask) & possible:
+            return (43 - counter) // 2
+
+        minimum = -((42 - counter) // 2)
+        maximum = (43 - counter) // 2
+        while minimum < maximum:
+            ##Bisect the score range, biased towards zero as most positions are close
+            median = minimum + (maximum - minimum) // 2
+            if median <= 0 and int(minimum / 2) < median:
+                median = int(minimum / 2)
+            elif median >= 0 and int(maximum / 2) > median:
+                median = int(maximum / 2)
+            result = self.null_window(current, mask, counter, median, median + 1)
+            if result <= median:
+                maximum = result
+            else:
+                minimum = result
+        return minimum
+
+    def null_window(self, current : int, mask : int, counter : int, alpha : int, beta : int) -> int:
+        """Negamax search to the end of the game
+        The player to move must not have a winning move available
+
+        Args:
+            current (int): Stones of the player to move
+            mask (int): All stones
+            counter (int): Number of moves played
+            alpha (int): Pruning lower bound
+            beta (int): Pruning upper bound
+
+        Returns:
+            int: Score, exact if inside the window, otherwise a bound
+        """
+        ##Only check the clock every 1024 nodes
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.check_budget()
+
+        ##Forced blocks only, and never directly below an opponent's winning cell
+        possible = non_losing_moves(current, mask)
+        if possible == 0:
+            return -((42 - counter) // 2)
+        if counter >= 40:
+            return 0
+
+        key = canonical_key(current + mask) ##Mirror images have the same score
+        ##Tablebase scores are on the same scale and exact
+        if self.tablebase is not None and counter >= self.tablebase.min_stones:
+            score = self.tablebase.probe(key)
+            if score is not None:
+                return score
+
+        ##Neither player can win with their next move
+        minimum = -((40 - counter) // 2)
+        maximum = (41 - counter) // 2
+        entry = self.transposition_table.probe(key)
+        if entry is not None:
+            tt_eval, tt_depth, tt_flag, tt_move = entry
+            if tt_flag == TT_Flag.upper:
+                maximum = min(maximum, tt_eval)
+            elif tt_flag == TT_Flag.lower:
+                minimum = max(minimum, tt_eval)
+        if alpha < minimum:
+            alpha = minimum
+            if alpha >= beta:
+                return alpha
+        if beta > maximum:
+            beta = maximum
+            if alpha >= beta:
+                return beta
+
+        ##Try moves creating the most winning cells first
+        moves = []
+        for col in self.column_order:
+            move = possible & column_mask(col)
+            if move:
+                threats = (winning_squares(current | move, mask) & ~mask).bit_count()
+                moves.append((threats, move, col))
+        moves.sort(key = lambda x : -x[0])
+
+        for threats, move, col in moves:
+            score = -self.null_window(current ^ mask, mask | move, counter + 1, -beta, -alpha)
+            if score >= beta:
+                self.transposition_table.store(key, score, 0, TT_Flag.lower, col)
+                return score
+            if score > alpha:
+                alpha = score
+        self.transposition_table.store(key, alpha, 0, TT_Flag.upper, -1)
+        return alpha
+
+    def moves_to_end(self, score : int) -> int:
+        """Converts an exact score into the number of moves until the game ends
+
+        Args:
+            score (int): Exact score of the initial position
+
+        Returns:
+            int: Moves, including the final one, until the game is won or drawn
+        """
+        counter = self.board.get_counter()
+        if score > 0:
+            ##Number of moves played before the winning move
+            last = 43 - 2*score - ((counter + 1) & 1)
+        elif score < 0:
+            last = 43 + 2*score - (counter & 1)
+        else:
+            return 42 - counter
+        return last - counter + 1
@@ -0,0 +1,84 @@
+from multiprocessing import Process, Queue, Event
+from queue import Empty
+from ai import Minimax
+
+def run_search(messages : Queue, stop_event : Event, ai : Minimax, time_limit : float):
+    """Runs an iterative deepening search in the worker process,
+    sending a message after each completed iteration and once finished
+
+    Args:
+        messages (Queue): Queue back to the main process
+        stop_event (Event): Set by the main process to cancel the search
+        ai (Minimax): Copy of the engine to search with, its transposition table
+            is shared with the main process if a SharedTranspositionTable
+        time_limit (float): Wall-clock budget in seconds, or None
+    """
+    ai.stop_event = stop_event
+
+    def progress(depth, move, score):
+        messages.put(('progress', depth, move, score))
+
+    move = ai.iterative_search(time_limit, progress = progress)
+    ##Table is left open, a forked process holds the main process's own copy
+    messages.put(('done', move, ai.get_search_state()))
+
+class AsyncSearch:
+    """Search running in a separate process, so the caller's loop keeps running
+    Progress is collected by calling poll, and the search can be cancelled at any time
+    The engine's move ordering and principal variation are updated when it finishes
+    """
+
+    def __init__(self, ai : Minimax, time_limit : float = None):
+        """Constructor method for an asynchronous search
+
+        Args:
+            ai (Minimax): Engine to search with, kept in the main process,
+                a SharedTranspositionTable keeps the search's results
+            time_limit (float, optional): Wall-clock budget in seconds
+        """
+        self.ai = ai
+        self.messages = Queue()
+        self.stop_event = Event()
+        self.process = Process(target = run_search, args = (self.messages, self.stop_event,
+            ai, time_limit), daemon = True)
+        self.depth = -1 ##Deepest completed iteration so far
+        self.best_move = None
+        self.score = None
+        self.finished = False
+
+    def start(self):
+        """Starts the search process
+        """
+        self.process.start()
+
+    def poll(self) -> bool:
+        """Collects any messages from the search without waiting
+
+        Returns:
+            bool: Search has finished
+        """
+        while not self.finished:
+            try:
+                message = self.messages.get_nowait()
+            except Empty:
+                break
+            if message[0] == 'progress':
+                self.depth, self.best_move, self.score = message[1:]
+            else:
+                ##Engine keeps what the search learnt for the next turn
+                self.best_move, state = message[1:]
+                self.ai.set_search_state(state)
+                self.finished = True
+                self.process.join()
+        return self.finished
+
+    def cancel(self):
+        """Stops the search and waits for the process to finish
+        """
+        if self.finished or not self.process.is_alive():
+            return
+        self.stop_event.set()
+        while not self.poll():
+            if not self.process.is_alive() and self.messages.empty():
+                break
+            self.process.join(0.01)
@@ -7,12 +7,20 @@ Bitboard = NewType('Bitboard', np.uint64())
 
 ##Variable definitions for readability
 LSB1 = 1
+AI_TIME_LIMIT = 3.0 ##Seconds the ai may think for each move
+WIN_THRESHOLD = 9000 ##Evaluations beyond this are wins or losses, heuristics stay below it
 
 class Status:
     game_won = 1
     game_drawn = 0
     game_unfinished = -1
 
+class TT_Flag:
+    empty = 0
+    exact = 1
+    lower = 2
+    upper = 3
+
 class Save_Type:
     position = 1
     game = 0
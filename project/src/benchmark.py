@@ -0,0 +1,291 @@
+import json
+import os
+import platform
+import random
+import sys
+from argparse import ArgumentParser
+from time import perf_counter
+from ai import Minimax, Negamax, Solver
+from board import Board, CompactBoard
+from auxiliary import Status
+from ordering import CentreOrdering, HistoryOrdering, ThreatOrdering
+
+##Fixed positions as move histories, from the opening into the middlegame
+BENCHMARK_POSITIONS = [
+    [],
+    [3,3,2],
+    [3,3,3,3,2,4],
+    [3,2,3,3,4,4,1,2],
+    [3,3,3,3,3,2,2,4,4,1],
+    [2,3,3,4,4,4,5,1,3,2,5,5]
+]
+
+##Versioned suite of positions, regenerate with --generate and bump the version
+##whenever the positions change, so results are only compared on the same set
+POSITIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_positions.json")
+POSITIONS_VERSION = 1
+
+##Engine and move ordering pairs measured by the suite
+CONFIGURATIONS = {
+    'minimax-centre' : (Minimax, CentreOrdering),
+    'minimax-history' : (Minimax, HistoryOrdering),
+    'minimax-threat' : (Minimax, ThreatOrdering),
+    'negamax-centre' : (Negamax, CentreOrdering),
+    'negamax-history' : (Negamax, HistoryOrdering),
+    'negamax-threat' : (Negamax, ThreatOrdering)
+}
+
+##Smallest change in seconds treated as a time regression, shorter changes are noise
+TIME_NOISE = 0.05
+
+def run_engine(engine : type, positions : list, depth : int,
+        ordering : type = HistoryOrdering) -> dict:
+    """Searches every position with one engine at a fixed depth
+
+    Args:
+        engine (type): Engine class with the Minimax search() contract
+        positions (list): Move histories to search
+        depth (int): Search depth
+        ordering (type, optional): Move ordering class, a new one for each position
+
+    Returns:
+        dict: Total nodes, total time and the move chosen in each position
+    """
+    nodes = 0
+    moves = []
+    start = perf_counter()
+    for position in positions:
+        ai = engine(position, depth, move_ordering = ordering())
+        moves.append(ai.search())
+        nodes += ai.nodes
+    return {'nodes' : nodes, 'time' : perf_counter() - start, 'moves' : moves}
+
+def compare_engines(depth : int, positions : list = BENCHMARK_POSITIONS):
+    """Prints node counts for Minimax and Negamax at equal depth
+
+    Args:
+        depth (int): Search depth
+        positions (list, optional): Move histories to search
+    """
+    baseline = run_engine(Minimax, positions, depth)
+    for engine in [Minimax, Negamax]:
+        result = baseline if engine is Minimax else run_engine(engine, positions, depth)
+        reduction = 1 - result['nodes'] / baseline['nodes']
+        print(f"{engine.__name__:<10} depth {depth:<3} nodes {result['nodes']:<10} "
+            f"time {result['time']:.2f}s  reduction {reduction:.1%}  moves {result['moves']}")
+
+def compare_ordering(depth : int, positions : list = BENCHMARK_POSITIONS):
+    """Prints node counts for each engine with each move ordering,
+    against centre distance ordering
+
+    Args:
+        depth (int): Search depth
+        positions (list, optional): Move histories to search
+    """
+    for engine in [Minimax, Negamax]:
+        baseline = run_engine(engine, positions, depth, CentreOrdering)
+        for ordering in [CentreOrdering, HistoryOrdering, ThreatOrdering]:
+            result = baseline if ordering is CentreOrdering else run_engine(engine, positions, depth, ordering)
+            reduction = 1 - result['nodes'] / baseline['nodes']
+            print(f"{engine.__name__:<10} {ordering.__name__:<16} depth {depth:<3} "
+                f"nodes {result['nodes']:<10} time {result['time']:.2f}s  reduction {reduction:.1%}")
+
+
+def random_position(rng : random.Random, stones : int) -> list:
+    """Plays random moves until a position with a number of stones
+    that is unfinished and has no immediate win
+
+    Args:
+        rng (random.Random): Seeded generator
+        stones (int): Stones in the position
+
+    Returns:
+        list: Move history of the position
+    """
+    while True:
+        board = CompactBoard()
+        for i in range(stones):
+            board.make_move(rng.choice(board.retrieve_valid_moves()))
+            if board.game_over() != Status.game_unfinished:
+                break
+        else:
+            if not board.can_win_next():
+                return list(board.get_move_history())
+
+def generate_positions(path : str = POSITIONS_FILE, seed : int = POSITIONS_VERSION):
+    """Writes the versioned benchmark positions
+    Openings are the fixed BENCHMARK_POSITIONS, too deep to solve here,
+    middlegame and endgame positions are random but close, and solved with Solver
+
+    Args:
+        path (str, optional): File to write
+        seed (int, optional): Seed for the random positions
+    """
+    rng = random.Random(seed)
+    positions = [{'name' : f"opening-{i}", 'phase' : 'opening', 'moves' : moves, 'scores' : None}
+        for i, moves in enumerate(BENCHMARK_POSITIONS)]
+    for phase, stones, count in [('middlegame', 16, 4), ('endgame', 24, 4)]:
+        found = 0
+        while found < count:
+            moves = random_position(rng, stones)
+            scores = Solver(moves).analyse()
+            ##Keep positions where the result is still in doubt
+            if abs(max(scores.values())) > 6:
+                continue
+            positions.append({'name' : f"{phase}-{found}", 'phase' : phase, 'moves' : moves,
+                'scores' : {str(col) : score for col, score in scores.items()}})
+            found += 1
+            print(f"{phase} {moves} {scores}")
+    with open(path, 'w') as file:
+        json.dump({'version' : POSITIONS_VERSION, 'positions' : positions}, file, indent = 1)
+
+def load_positions(path : str = POSITIONS_FILE) -> dict:
+    """Loads the versioned benchmark positions
+
+    Args:
+        path (str, optional): File to read
+
+    Returns:
+        dict: Version and list of positions
+    """
+    with open(path) as file:
+        return json.load(file)
+
+def benchmark_board(board_class : type, games : int = 200, seed : int = 0) -> dict:
+    """Times random make and undo moves on a board class
+
+    Args:
+        board_class (type): Board or CompactBoard
+        games (int, optional): Random games to play and take back
+        seed (int, optional): Seed for the random games
+
+    Returns:
+        dict: Moves made and moves made per second
+    """
+    rng = random.Random(seed)
+    board = board_class()
+    moves = 0
+    start = perf_counter()
+    for i in range(games):
+        while board.game_over() == Status.game_unfinished:
+            board.make_move(rng.choice(board.retrieve_valid_moves()))
+            moves += 1
+        while board.get_counter() > 0:
+            board.undo_move()
+    elapsed = perf_counter() - start
+    return {'moves' : moves, 'time' : elapsed, 'moves_per_second' : moves / elapsed}
+
+def run_suite(depths : list, configurations : dict = CONFIGURATIONS,
+        path : str = POSITIONS_FILE, repeats : int = 3) -> dict:
+    """Searches every suite position with every configuration at each depth
+    Each search is repeated and the fastest time kept, to reduce noise
+
+    Args:
+        depths (list): Search depths
+        configurations (dict, optional): Engine and move ordering pairs by name
+        path (str, optional): File of benchmark positions
+        repeats (int, optional): Times to repeat each search
+
+    Returns:
+        dict: Results that can be saved as JSON and compared with compare_results
+    """
+    suite = load_positions(path)
+    results = {'version' : suite['version'], 'python' : platform.python_version(),
+        'engines' : {}, 'boards' : {}}
+    for name, (engine, ordering) in configurations.items():
+        for depth in depths:
+            totals = {'nodes' : 0, 'time' : 0.0, 'optimal' : 0, 'solved' : 0, 'positions' : {}}
+            for position in suite['positions']:
+                elapsed = None
+                for i in range(repeats):
+                    ai = engine(position['moves'], depth, move_ordering = ordering())
+                    start = perf_counter()
+                    move = ai.search()
+                    time = perf_counter() - start
+                    if elapsed is None or time < elapsed:
+                        elapsed = time
+                totals['nodes'] += ai.nodes
+                totals['time'] += elapsed
+                totals['positions'][position['name']] = {'move' : move, 'nodes' : ai.nodes, 'time' : elapsed}
+                if position['scores'] is not None:
+                    ##Any move with the best solved score is optimal
+                    scores = position['scores']
+                    totals['solved'] += 1
+                    totals['optimal'] += scores[str(move)] == max(scores.values())
+            totals['nodes_per_second'] = totals['nodes'] / totals['time']
+            results['engines'][f"{name}/{depth}"] = totals
+            print(f"{name:<16} depth {depth:<3} nodes {totals['nodes']:<10} time {totals['time']:.2f}s "
+                f"{totals['nodes_per_second']:.0f}/s optimal {totals['optimal']}/{totals['solved']}")
+    for board_class in [Board, CompactBoard]:
+        result = max((benchmark_board(board_class) for i in range(repeats)),
+            key = lambda x : x['moves_per_second'])
+        results['boards'][board_class.__name__] = result
+        print(f"{board_class.__name__:<16} {result['moves_per_second']:.0f} moves/s")
+    return results
+
+def compare_results(results : dict, baseline : dict, threshold : float = 0.1,
+        time_threshold : float = 0.25) -> list:
+    """Finds regressions against a stored baseline
+    Node counts are deterministic, so any growth past the threshold is a regression,
+    times are noisier and should be compared on the same machine
+
+    Args:
+        results (dict): Results from run_suite
+        baseline (dict): Earlier results from run_suite
+        threshold (float, optional): Allowed fractional change in nodes
+        time_threshold (float, optional): Allowed fractional change in times and speeds
+
+    Returns:
+        list: Description of each regression, empty if there are none
+    """
+    if results['version'] != baseline['version']:
+        return [f"positions version {results['version']} differs from baseline {baseline['version']}"]
+    regressions = []
+    for key, result in results['engines'].items():
+        if key not in baseline['engines']:
+            continue
+        base = baseline['engines'][key]
+        if result['nodes'] > base['nodes'] * (1 + threshold):
+            regressions.append(f"{key} nodes {base['nodes']} -> {result['nodes']}")
+        if result['time'] > base['time'] * (1 + time_threshold) and result['time'] - base['time'] > TIME_NOISE:
+            regressions.append(f"{key} time {base['time']:.2f}s -> {result['time']:.2f}s")
+        if result['optimal'] < base['optimal']:
+            regressions.append(f"{key} optimal moves {base['optimal']} -> {result['optimal']}")
+    for key, result in results['boards'].items():
+        if key not in baseline['boards']:
+            continue
+        base = baseline['boards'][key]
+        if result['moves_per_second'] < base['moves_per_second'] * (1 - time_threshold):
+            regressions.append(f"{key} moves/s {base['moves_per_second']:.0f} -> "
+                f"{result['moves_per_second']:.0f}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description = "Benchmark the engines on a fixed suite of positions")
+    parser.add_argument('--depths', type = int, nargs = '+', default = [4,6])
+    parser.add_argument('--output', help = "file to write the results to as JSON")
+    parser.add_argument('--baseline', help = "earlier results to check for regressions")
+    parser.add_argument('--threshold', type = float, default = 0.1,
+        help = "allowed fractional change in nodes before a regression is flagged")
+    parser.add_argument('--time-threshold', type = float, default = 0.25,
+        help = "allowed fractional change in times and speeds")
+    parser.add_argument('--repeats', type = int, default = 3, help = "times to repeat each search")
+    parser.add_argument('--generate', action = 'store_true', help = "regenerate the positions file")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_positions()
+    results = run_suite(args.depths, repeats = args.repeats)
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent = 1)
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            regressions = compare_results(results, json.load(file), args.threshold,
+                args.time_threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
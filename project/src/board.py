@@ -1,17 +1,134 @@
 from auxiliary import Bitboard, LSB1, Status
 
+##Masks for the bitboard layout, 7 bits per column with the top bit always empty
+BOTTOM_MASK = sum(LSB1 << 7*col for col in range(7)) ##Bottom cell of each column
+BOARD_MASK = BOTTOM_MASK * 63 ##All 42 playable cells
+BOTTOM_MASKS = [LSB1 << 7*col for col in range(7)]
+TOP_MASKS = [LSB1 << (5 + 7*col) for col in range(7)]
+COLUMN_MASKS = [63 << 7*col for col in range(7)]
+TOP_MASK = sum(TOP_MASKS)
+
+##Valid moves for each pattern of full columns, so move generation is a lookup
+VALID_MOVES = {}
+for full in range(128):
+    VALID_MOVES[sum(TOP_MASKS[col] for col in range(7) if full & (1 << col))] = \
+        tuple(col for col in range(7) if not full & (1 << col))
+
+def column_mask(column : int) -> int:
+    """Bitboard of the playable cells in a column
+
+    Args:
+        column (int): Column
+
+    Returns:
+        int: Mask of the column
+    """
+    return 63 << 7*column
+
+##All 7 bits of each column of a key, for mirroring
+KEY_COLUMN_MASKS = [127 << 7*col for col in range(7)]
+_KEY_0, _KEY_1, _KEY_2, _KEY_3, _KEY_4, _KEY_5, _KEY_6 = KEY_COLUMN_MASKS
+
+def mirror_key(key : int) -> int:
+    """Mirrors a position key left to right
+    Each pair of columns is swapped with one shift each way, the centre column stays
+
+    Args:
+        key (int): Position key
+
+    Returns:
+        int: Key of the mirror image position
+    """
+    return (key & _KEY_3) \
+        | ((key & _KEY_0) << 42) | ((key & _KEY_6) >> 42) \
+        | ((key & _KEY_1) << 28) | ((key & _KEY_5) >> 28) \
+        | ((key & _KEY_2) << 14) | ((key & _KEY_4) >> 14)
+
+def canonical_key(key : int) -> int:
+    """Key shared by a position and its left-right mirror image
+
+    Args:
+        key (int): Position key
+
+    Returns:
+        int: Smaller of the key and mirrored key
+    """
+    mirrored = mirror_key(key)
+    return mirrored if mirrored < key else key
+
+def winning_squares(position : int, mask : int) -> int:
+    """Finds the empty cells that would complete a four in a row for a player
+
+    Args:
+        position (int): Bitboard of the player's stones
+        mask (int): Bitboard of all stones
+
+    Returns:
+        int: Bitboard of winning cells, playable now or not
+    """
+    ##Vertical, only possible on top of a run of three
+    squares = (position << 1) & (position << 2) & (position << 3)
+    ##Horizontal and both diagonals, allowing the gap anywhere in the four
+    for d in [7,6,8]:
+        pair = (position << d) & (position << 2*d)
+        squares |= pair & (position << 3*d)
+        squares |= pair & (position >> d)
+        pair = (position >> d) & (position >> 2*d)
+        squares |= pair & (position << d)
+        squares |= pair & (position >> 3*d)
+    return squares & (BOARD_MASK ^ mask)
+
+def non_losing_moves(current : int, mask : int) -> int:
+    """Finds the moves that do not let the opponent win with their next move
+    Assumes the player to move cannot win immediately
+
+    Args:
+        current (int): Bitboard of the player to move's stones
+        mask (int): Bitboard of all stones
+
+    Returns:
+        int: Bitboard of the cells worth playing, 0 if every move loses
+    """
+    playable = (mask + BOTTOM_MASK) & BOARD_MASK
+    opponent_win = winning_squares(current ^ mask, mask)
+    forced = playable & opponent_win
+    if forced:
+        if forced & (forced - 1):
+            ##Two threats cannot both be blocked
+            return 0
+        playable = forced
+    ##Playing directly below an opponent's winning cell lets them play it
+    return playable & ~(opponent_win >> 1)
+
 class Board:
 
-    def __init__(self):
+    def __init__(self, evaluator = None):
+        """Constructor method for a board
+
+        Args:
+            evaluator (IncrementalEvaluation, optional): Running evaluation to keep
+                up to date with each move, None to keep the board lightweight
+        """
         self._bitboards = Bitboard([0,0]) ##2 64-bit integers as the bitboards
         self._heights = [0,7,14,21,28,35,42] ##Positions of bottom row in the bitboards
         self._counter = 0
         self._move_history = []
+        self._evaluator = evaluator
 
     def reset(self):
         """Resets attributes - primarily for use in testing
         """
-        self.__init__()
+        if self._evaluator is not None:
+            self._evaluator.reset()
+        self.__init__(self._evaluator)
+
+    def get_evaluator(self):
+        """Get method for _evaluator
+
+        Returns:
+            IncrementalEvaluation: Running evaluation, None if not enabled
+        """
+        return self._evaluator
 
     def get_counter(self) -> int:
         """Get method for _counter
@@ -51,6 +168,72 @@ class Board:
         """
         return self._heights[index]
 
+    def get_key(self) -> int:
+        """Unique key for the current position
+        Current player's stones plus the mask of all stones,
+        so each column gets a single marker bit above its stones
+
+        Returns:
+            int: 49-bit position key
+        """
+        mask = self._bitboards[0] | self._bitboards[1]
+        return self._bitboards[self._counter & 1] + mask
+
+    def get_mask(self) -> int:
+        """Bitboard of every stone played
+
+        Returns:
+            int: Mask of occupied cells
+        """
+        return self._bitboards[0] | self._bitboards[1]
+
+    def get_playable(self) -> int:
+        """Bitboard of the cells that can be played in next
+
+        Returns:
+            int: Lowest empty cell of each column that is not full
+        """
+        return (self.get_mask() + BOTTOM_MASK) & BOARD_MASK
+
+    def get_winning_squares(self, index : int) -> int:
+        """Bitboard of the empty cells that would win for a player
+
+        Args:
+            index (int): The player's bitboard
+
+        Returns:
+            int: Winning cells
+        """
+        return winning_squares(self._bitboards[index], self.get_mask())
+
+    def can_win_next(self) -> bool:
+        """Checks whether the player to move has a winning move
+
+        Returns:
+            bool: A winning cell is playable
+        """
+        return self.get_winning_squares(self._counter & 1) & self.get_playable() != 0
+
+    def get_non_losing(self) -> int:
+        """Bitboard of the moves that do not lose immediately
+        Only meaningful if the player to move cannot win at once
+
+        Returns:
+            int: Cells worth playing, 0 if every move loses
+        """
+        return non_losing_moves(self._bitboards[self._counter & 1], self.get_mask())
+
+    def get_canonical_key(self) -> tuple:
+        """Key shared by a position and its left-right mirror image
+
+        Returns:
+            tuple: Smaller of the key and mirrored key, and whether it was mirrored
+        """
+        key = self.get_key()
+        mirrored = mirror_key(key)
+        if mirrored < key:
+            return mirrored, True
+        return key, False
 
     def make_move(self, column : int):
         """Plays a move in the next player's bitboard
@@ -63,6 +246,8 @@ class Board:
 
         board_index = self._counter & 1 ##Determine current player
         self._bitboards[board_index] ^= move ##Play move in bitboard
+        if self._evaluator is not None:
+            self._evaluator.play(self._heights[column], board_index)
 
         self._heights[column] += 1 ##Increment height of used column
         self._counter += 1 ##Increment counter
@@ -78,6 +263,8 @@ class Board:
         board_index = self._counter & 1 ##Determine last player's bitboard
 
         self._bitboards[board_index] ^= move ##Remove move from bitboard
+        if self._evaluator is not None:
+            self._evaluator.unplay(self._heights[column], board_index)
         self._move_history.pop() ##Remove move from move history
 
     def check_win(self) -> bool:
@@ -155,3 +342,258 @@ class Board:
                 row.append(board_arr[r + (c*7)])
             output_arr.append(row)
         return output_arr
+
+
+class CompactBoard:
+    """Board stored as two integers, the player to move's stones and the mask of all stones
+    Has the same interface as Board, but with cheaper moves, copies and hashing,
+    for use inside the search
+    """
+
+    __slots__ = ['_current', '_mask', '_counter', '_move_history', '_evaluator']
+
+    def __init__(self, evaluator = None):
+        """Constructor method for a compact board
+
+        Args:
+            evaluator (IncrementalEvaluation, optional): Running evaluation to keep
+                up to date with each move, None to keep the board lightweight
+        """
+        self._current = 0 ##Stones of the player to move
+        self._mask = 0 ##Stones of both players
+        self._counter = 0
+        self._move_history = []
+        self._evaluator = evaluator
+
+    def reset(self):
+        """Resets attributes - primarily for use in testing
+        """
+        if self._evaluator is not None:
+            self._evaluator.reset()
+        self.__init__(self._evaluator)
+
+    def copy(self):
+        """Copies the position, without any running evaluation
+
+        Returns:
+            CompactBoard: Independent copy of the board
+        """
+        board = CompactBoard()
+        board._current = self._current
+        board._mask = self._mask
+        board._counter = self._counter
+        board._move_history = self._move_history[:]
+        return board
+
+    def __hash__(self) -> int:
+        return self._current + self._mask
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CompactBoard) and self._current == other._current \
+            and self._mask == other._mask
+
+    def get_evaluator(self):
+        """Get method for _evaluator
+
+        Returns:
+            IncrementalEvaluation: Running evaluation, None if not enabled
+        """
+        return self._evaluator
+
+    def get_counter(self) -> int:
+        """Get method for _counter
+
+        Returns:
+            int: Current number of moves played
+        """
+        return self._counter
+
+    def get_move_history(self) -> list:
+        """Get method for _move_history
+
+        Returns:
+            list: Current move history
+        """
+        return self._move_history
+
+    def get_bitboard(self, index : int) -> int:
+        """Get method for a bitboard
+
+        Args:
+            index (int): The bitboard to return
+
+        Returns:
+            int: The desired bitboard
+        """
+        if index == self._counter & 1:
+            return self._current
+        return self._current ^ self._mask
+
+    def get_height(self, index : int) -> int:
+        """Get method for height in a column
+
+        Args:
+            index (int): Column
+
+        Returns:
+            int: Height of next empty cell (starting from 0,7,14 etc.)
+        """
+        return 7*index + (self._mask & COLUMN_MASKS[index]).bit_count()
+
+    def get_key(self) -> int:
+        """Unique key for the current position, as Board.get_key
+
+        Returns:
+            int: 49-bit position key
+        """
+        return self._current + self._mask
+
+    def get_mask(self) -> int:
+        """Bitboard of every stone played
+
+        Returns:
+            int: Mask of occupied cells
+        """
+        return self._mask
+
+    def get_playable(self) -> int:
+        """Bitboard of the cells that can be played in next
+
+        Returns:
+            int: Lowest empty cell of each column that is not full
+        """
+        return (self._mask + BOTTOM_MASK) & BOARD_MASK
+
+    def get_winning_squares(self, index : int) -> int:
+        """Bitboard of the empty cells that would win for a player
+
+        Args:
+            index (int): The player's bitboard
+
+        Returns:
+            int: Winning cells
+        """
+        return winning_squares(self.get_bitboard(index), self._mask)
+
+    def can_win_next(self) -> bool:
+        """Checks whether the player to move has a winning move
+
+        Returns:
+            bool: A winning cell is playable
+        """
+        return winning_squares(self._current, self._mask) \
+            & (self._mask + BOTTOM_MASK) & BOARD_MASK != 0
+
+    def get_non_losing(self) -> int:
+        """Bitboard of the moves that do not lose immediately
+        Only meaningful if the player to move cannot win at once
+
+        Returns:
+            int: Cells worth playing, 0 if every move loses
+        """
+        return non_losing_moves(self._current, self._mask)
+
+    def get_canonical_key(self) -> tuple:
+        """Key shared by a position and its left-right mirror image
+
+        Returns:
+            tuple: Smaller of the key and mirrored key, and whether it was mirrored
+        """
+        key = self._current + self._mask
+        mirrored = mirror_key(key)
+        if mirrored < key:
+            return mirrored, True
+        return key, False
+
+    def make_move(self, column : int):
+        """Plays a move for the player to move
+
+        Args:
+            column (int): The column of the move
+        """
+        self._move_history.append(column)
+        move = (self._mask + BOTTOM_MASKS[column]) & COLUMN_MASKS[column]
+        if self._evaluator is not None:
+            self._evaluator.play(move.bit_length() - 1, self._counter & 1)
+        ##Opponent's stones become the current stones
+        self._current ^= self._mask
+        self._mask |= move
+        self._counter += 1
+
+    def undo_move(self):
+        """Removes the last move played
+        """
+        self._counter -= 1
+        column = self._move_history.pop()
+        ##Highest stone in the column
+        move = LSB1 << ((self._mask & COLUMN_MASKS[column]).bit_length() - 1)
+        self._mask ^= move
+        self._current ^= self._mask
+        if self._evaluator is not None:
+            self._evaluator.unplay(move.bit_length() - 1, self._counter & 1)
+
+    def check_win(self) -> bool:
+        """Checks whether the last move created a four in a row
+
+        Returns:
+            bool: Game won or not
+        """
+        b0 = self._current ^ self._mask ##Stones of the player who just moved
+        for d in [1,7,6,8]: ##The 4 shift directions to check
+            b1 = b0 & (b0 >> d)
+            if b1 & (b1 >> (2*d)):
+                return True
+        return False
+
+    def game_over(self) -> int:
+        """Return status code representing game state
+
+        Returns:
+            int: Status code
+        """
+        if self.check_win():
+            return Status.game_won
+        elif self._counter == 42:
+            return Status.game_drawn
+        else:
+            return Status.game_unfinished
+
+    def retrieve_valid_moves(self) -> tuple:
+        """Retrieve all valid moves in a position
+        The tuple is shared between positions, so must not be modified
+
+        Returns:
+            tuple: All valid moves
+        """
+        return VALID_MOVES[self._mask & TOP_MASK]
+
+    def can_play(self, column : int) -> bool:
+        """Checks whether a column has space for another stone
+
+        Args:
+            column (int): Column
+
+        Returns:
+            bool: Column is not full
+        """
+        return self._mask & TOP_MASKS[column] == 0
+
+    def output(self) -> list:
+        """Convert the bitboards into a more understandable representation of the board
+
+        Returns:
+            list: Board representation
+        """
+        output_arr = []
+        for r in range(5, -1, -1): ##Organise values into structured array
+            row = []
+            for c in range(7):
+                bit = LSB1 << (r + c*7)
+                if self.get_bitboard(0) & bit: ##Played by first player
+                    row.append('X')
+                elif self.get_bitboard(1) & bit: ##Played by second player
+                    row.append('O')
+                else:
+                    row.append('-')
+            output_arr.append(row)
+        return output_arr
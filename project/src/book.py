@@ -0,0 +1,38 @@
+from board import Board
+from storage import get_connection
+
+def probe_book(board : Board, database : str) -> int:
+    """Looks up the current position in the opening book
+    Positions are stored under their canonical key, so moves of
+    mirrored positions are mirrored back
+
+    Args:
+        board (Board): Current board instance
+        database (str): Database to use
+
+    Returns:
+        int: Book move, or None if the position is not in the book
+    """
+    key, mirrored = board.get_canonical_key()
+    result = get_connection(database).execute("SELECT move FROM book WHERE positionKey = ?",
+        (key,)).fetchone()
+
+    if result is None:
+        return None
+    elif mirrored:
+        return 6 - result[0]
+    return result[0]
+
+def save_book(entries : list, database : str):
+    """Saves entries to the opening book in a single transaction
+
+    Args:
+        entries (list): Tuples of (canonical key, move, score, depth),
+            with moves for the canonical orientation
+        database (str): Database to use
+    """
+    conn = get_connection(database)
+    with conn: ##Commits once at the end, or rolls back every entry on error
+        conn.executemany("""
+        INSERT OR REPLACE INTO book (positionKey, move, score, depth) VALUES (?, ?, ?, ?)
+        """, entries)
@@ -0,0 +1,284 @@
+import numpy as np
+from board import Board
+
+##Fixed evaluation for each bit of a bitboard, one column of 7 bits per row
+STATIC_WEIGHTS = [
+    3,4,5,5,4,3,0,
+    4,6,8,8,6,4,0,
+    5,8,11,11,8,5,0,
+    7,10,13,13,10,7,0,
+    5,8,11,11,8,5,0,
+    4,6,8,8,6,4,0,
+    3,4,5,5,4,3,0,
+    0,0,0,0,0,0,0,
+    0,0,0,0,0,0,0,0
+]
+
+##Cells grouped by weight, so the static evaluation is a few popcounts
+WEIGHT_MASKS = {}
+for i, weight in enumerate(STATIC_WEIGHTS):
+    if weight != 0:
+        WEIGHT_MASKS[weight] = WEIGHT_MASKS.get(weight, 0) | (1 << i)
+
+def window_mask(column : int, row : int, d_column : int, d_row : int) -> int:
+    """Bitboard of four cells in a line
+
+    Args:
+        column (int): Column of the first cell
+        row (int): Row of the first cell
+        d_column (int): Column step between cells
+        d_row (int): Row step between cells
+
+    Returns:
+        int: Mask of the four cells
+    """
+    return sum(1 << 7*(column + i*d_column) + row + i*d_row for i in range(4))
+
+##Every four in a row on the board, 69 in total
+WINNING_WINDOWS = [window_mask(c, r, 1, 0) for c in range(4) for r in range(6)] \
+    + [window_mask(c, r, 0, 1) for c in range(7) for r in range(3)] \
+    + [window_mask(c, r, 1, 1) for c in range(4) for r in range(3)] \
+    + [window_mask(c, r, 1, -1) for c in range(4) for r in range(3, 6)]
+
+##Score for a window holding 1, 2 or 3 of a player's stones and none of the opponent's
+##Kept well below the win score of 10000
+WINDOW_SCORES = [0, 1, 10, 100, 0]
+
+##Change in a window's score when a player adds a stone to it
+WINDOW_DELTAS = [WINDOW_SCORES[i+1] - WINDOW_SCORES[i] for i in range(4)]
+
+##Indices of the windows each bit of a bitboard belongs to
+SQUARE_WINDOWS = [[w for w, window in enumerate(WINNING_WINDOWS) if window & (1 << i)]
+    for i in range(49)]
+
+def window_evaluation(ai_board : int, opp_board : int) -> int:
+    """Evaluates a position by the windows each player can still complete
+    Windows containing stones of both players can never be won, so are ignored
+
+    Args:
+        ai_board (int): Bitboard of the player evaluated for
+        opp_board (int): Bitboard of their opponent
+
+    Returns:
+        int: Evaluation of the position
+    """
+    score = 0
+    for window in WINNING_WINDOWS:
+        ai_stones = window & ai_board
+        opp_stones = window & opp_board
+        if opp_stones == 0:
+            score += WINDOW_SCORES[ai_stones.bit_count()]
+        elif ai_stones == 0:
+            score -= WINDOW_SCORES[opp_stones.bit_count()]
+    return score
+
+def weighted_evaluation(ai_board : int, opp_board : int) -> int:
+    """Static evaluation of a single position using the weight masks
+
+    Args:
+        ai_board (int): Bitboard of the player evaluated for
+        opp_board (int): Bitboard of their opponent
+
+    Returns:
+        int: Evaluation of the position
+    """
+    score = 0
+    for weight, mask in WEIGHT_MASKS.items():
+        score += weight * ((ai_board & mask).bit_count() - (opp_board & mask).bit_count())
+    return score
+
+class IncrementalEvaluation:
+    """Running window and static scores for each player
+    Kept up to date by a Board's make_move and undo_move,
+    so evaluating a leaf is a lookup rather than a scan of every window
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Resets to the empty board
+        """
+        self._counts = [[0]*len(WINNING_WINDOWS), [0]*len(WINNING_WINDOWS)] ##Stones in each window
+        self._window_scores = [0,0]
+        self._static_scores = [0,0]
+
+    def play(self, square : int, player : int):
+        """Adds a stone to the scores
+
+        Args:
+            square (int): Bit position of the stone
+            player (int): Index of the player's bitboard
+        """
+        own = self._counts[player]
+        other = self._counts[1 - player]
+        window_scores = self._window_scores
+        for w in SQUARE_WINDOWS[square]:
+            stones = own[w]
+            if other[w] == 0:
+                window_scores[player] += WINDOW_DELTAS[stones]
+            elif stones == 0:
+                ##Window is now blocked for the opponent
+                window_scores[1 - player] -= WINDOW_SCORES[other[w]]
+            own[w] = stones + 1
+        self._static_scores[player] += STATIC_WEIGHTS[square]
+
+    def unplay(self, square : int, player : int):
+        """Removes a stone from the scores, reversing play
+
+        Args:
+            square (int): Bit position of the stone
+            player (int): Index of the player's bitboard
+        """
+        own = self._counts[player]
+        other = self._counts[1 - player]
+        window_scores = self._window_scores
+        for w in SQUARE_WINDOWS[square]:
+            stones = own[w] - 1
+            own[w] = stones
+            if other[w] == 0:
+                window_scores[player] -= WINDOW_DELTAS[stones]
+            elif stones == 0:
+                window_scores[1 - player] += WINDOW_SCORES[other[w]]
+        self._static_scores[player] -= STATIC_WEIGHTS[square]
+
+    def window_score(self, player : int) -> int:
+        """Window evaluation for a player, as window_evaluation
+
+        Args:
+            player (int): Index of the player's bitboard
+
+        Returns:
+            int: Evaluation of the position
+        """
+        return self._window_scores[player] - self._window_scores[1 - player]
+
+    def static_score(self, player : int) -> int:
+        """Static evaluation for a player, as weighted_evaluation
+
+        Args:
+            player (int): Index of the player's bitboard
+
+        Returns:
+            int: Evaluation of the position
+        """
+        return self._static_scores[player] - self._static_scores[1 - player]
+
+def popcount(boards : np.ndarray) -> np.ndarray:
+    """Counts the set bits of every bitboard in an array
+
+    Args:
+        boards (np.ndarray): uint64 bitboards
+
+    Returns:
+        np.ndarray: Number of set bits in each bitboard
+    """
+    ##Sum bits in pairs, then nibbles, then bytes, then add the bytes with a multiply
+    boards = boards - ((boards >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    boards = (boards & np.uint64(0x3333333333333333)) \
+        + ((boards >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    boards = (boards + (boards >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((boards * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+def batch_static_evaluation(ai_boards : np.ndarray, opp_boards : np.ndarray) -> np.ndarray:
+    """Static evaluation of many positions, as Minimax.static_evaluation
+
+    Args:
+        ai_boards (np.ndarray): uint64 bitboards of the player evaluated for
+        opp_boards (np.ndarray): uint64 bitboards of their opponent
+
+    Returns:
+        np.ndarray: Evaluation of each position
+    """
+    ai_boards = np.asarray(ai_boards, dtype = np.uint64)
+    opp_boards = np.asarray(opp_boards, dtype = np.uint64)
+    scores = np.zeros(ai_boards.shape, dtype = np.int64)
+    for weight, mask in WEIGHT_MASKS.items():
+        mask = np.uint64(mask)
+        scores += weight * (popcount(ai_boards & mask) - popcount(opp_boards & mask))
+    return scores
+
+def batch_feature_evaluation(ai_boards : np.ndarray, opp_boards : np.ndarray) -> np.ndarray:
+    """Feature-based evaluation of many positions, as Minimax.feature_evaluation
+
+    Args:
+        ai_boards (np.ndarray): uint64 bitboards of the player evaluated for
+        opp_boards (np.ndarray): uint64 bitboards of their opponent
+
+    Returns:
+        np.ndarray: Evaluation of each position
+    """
+    ai_boards = np.asarray(ai_boards, dtype = np.uint64)
+    opp_boards = np.asarray(opp_boards, dtype = np.uint64)
+    scores = np.zeros(ai_boards.shape, dtype = np.int64)
+    for d in [1,7,6,8]: ##4 shift directions to check
+        d1 = np.uint64(d)
+        d2 = np.uint64(2*d)
+        ai2 = ai_boards & (ai_boards >> d1) ##run of 2
+        ai3 = ai2 & (ai_boards >> d2) ##run of 3
+        opp2 = opp_boards & (opp_boards >> d1)
+        opp3 = opp2 & (opp_boards >> d2)
+        scores += 8000*(popcount(ai3) - popcount(opp3)) \
+            + 1000*(popcount(ai2) - popcount(opp2))
+    return scores
+
+def batch_window_evaluation(ai_boards : np.ndarray, opp_boards : np.ndarray) -> np.ndarray:
+    """Window evaluation of many positions, as window_evaluation
+
+    Args:
+        ai_boards (np.ndarray): uint64 bitboards of the player evaluated for
+        opp_boards (np.ndarray): uint64 bitboards of their opponent
+
+    Returns:
+        np.ndarray: Evaluation of each position
+    """
+    ai_boards = np.asarray(ai_boards, dtype = np.uint64)
+    opp_boards = np.asarray(opp_boards, dtype = np.uint64)
+    window_scores = np.array(WINDOW_SCORES, dtype = np.int64)
+    scores = np.zeros(ai_boards.shape, dtype = np.int64)
+    for window in WINNING_WINDOWS:
+        window = np.uint64(window)
+        ai_stones = popcount(ai_boards & window)
+        opp_stones = popcount(opp_boards & window)
+        ##A window scores nothing once both players have a stone in it
+        scores += np.where(opp_stones == 0, window_scores[ai_stones], 0)
+        scores -= np.where(ai_stones == 0, window_scores[opp_stones], 0)
+    return scores
+
+def batch_evaluate(ai_boards : np.ndarray, opp_boards : np.ndarray) -> np.ndarray:
+    """Evaluates many positions, choosing the evaluation as Minimax.evaluate does
+
+    Args:
+        ai_boards (np.ndarray): uint64 bitboards of the player evaluated for
+        opp_boards (np.ndarray): uint64 bitboards of their opponent
+
+    Returns:
+        np.ndarray: Evaluation of each position
+    """
+    ai_boards = np.asarray(ai_boards, dtype = np.uint64)
+    opp_boards = np.asarray(opp_boards, dtype = np.uint64)
+    counters = popcount(ai_boards | opp_boards)
+    return np.where(counters > 10,
+        batch_window_evaluation(ai_boards, opp_boards),
+        batch_static_evaluation(ai_boards, opp_boards))
+
+def histories_to_arrays(histories : list) -> tuple:
+    """Replays move histories into bitboard arrays for batch evaluation
+
+    Args:
+        histories (list): Move histories, such as games loaded from storage
+
+    Returns:
+        tuple: uint64 arrays of the player to move's and their opponent's bitboards
+    """
+    to_move = np.zeros(len(histories), dtype = np.uint64)
+    opponent = np.zeros(len(histories), dtype = np.uint64)
+    board = Board()
+    for i, history in enumerate(histories):
+        board.reset()
+        for move in history:
+            board.make_move(move)
+        index = board.get_counter() & 1
+        to_move[i] = board.get_bitboard(index)
+        opponent[i] = board.get_bitboard(1 - index)
+    return to_move, opponent
@@ -0,0 +1,81 @@
+from argparse import ArgumentParser
+from time import perf_counter
+from ai import Negamax
+from board import Board
+from book import save_book
+from auxiliary import Status
+from transposition import TranspositionTable
+
+def book_positions(max_ply : int) -> list:
+    """Finds every unfinished position up to a number of moves,
+    keeping one of each mirror-image pair
+
+    Args:
+        max_ply (int): Most moves played in a book position
+
+    Returns:
+        list: Move histories of the positions
+    """
+    board = Board()
+    seen = set()
+    positions = []
+
+    def visit():
+        key, mirrored = board.get_canonical_key()
+        if key in seen:
+            return
+        seen.add(key)
+        positions.append(list(board.get_move_history()))
+        if board.get_counter() == max_ply:
+            return
+        for move in board.retrieve_valid_moves():
+            board.make_move(move)
+            if board.game_over() == Status.game_unfinished:
+                visit()
+            board.undo_move()
+
+    visit()
+    return positions
+
+def generate_book(max_ply : int, depth : int, database : str) -> int:
+    """Searches every book position and writes the results to the database
+
+    Args:
+        max_ply (int): Most moves played in a book position
+        depth (int): Search depth for each position
+        database (str): Database to use
+
+    Returns:
+        int: Number of entries written
+    """
+    ##Negamax scores are relative to the player to move, and win scores are
+    ##stored counting from the start of the game, so one table can be shared
+    ##by every position's search
+    table = TranspositionTable()
+    entries = []
+    positions = book_positions(max_ply)
+    start = perf_counter()
+    for i, position in enumerate(positions):
+        ai = Negamax(position, depth, table)
+        table.new_search()
+        ordered_moves = ai.naive_move_sort(ai.root_moves())
+        best_move, move_evals = ai.search_root(ordered_moves)
+
+        ##Store the move for the canonical orientation
+        key, mirrored = ai.board.get_canonical_key()
+        book_move = 6 - best_move if mirrored else best_move
+        entries.append((key, book_move, move_evals[best_move], depth))
+        print(f"{i+1}/{len(positions)} {position} -> {best_move} ({perf_counter() - start:.1f}s)")
+
+    save_book(entries, database)
+    return len(entries)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description = "Generate the opening book")
+    parser.add_argument('--ply', type = int, default = 4, help = "most moves played in a book position")
+    parser.add_argument('--depth', type = int, default = 10, help = "search depth for each position")
+    parser.add_argument('--database', default = "Connect4.db")
+    args = parser.parse_args()
+    count = generate_book(args.ply, args.depth, args.database)
+    print(f"{count} book positions written to {args.database}")
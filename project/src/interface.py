@@ -1,8 +1,12 @@
 from board import Board
 from button import Button
-from auxiliary import Player_Type, Status, Save_Type, ReturnThread
+from auxiliary import Player_Type, Status, Save_Type, AI_TIME_LIMIT
 from storage import save
 from ai import Minimax
+from transposition import SharedTranspositionTable
+from ponder import Ponderer
+from async_search import AsyncSearch
+from tablebase import load_tablebase
 import tkinter as tk
 import pygame
 import os
@@ -143,22 +147,123 @@ class Interface:
         ##Initial button setup
         self.turn_setup(board)
 
+        ai = None
+        ponderer = None
+        if Player_Type.ai in self.players:
+            ##One engine is kept for the whole game, so its search tables carry over
+            ##Table is in shared memory so the search process can use it
+            ai = Minimax(board.get_move_history(), self.ai_strength, SharedTranspositionTable(),
+                book_database = 'Connect4.db', tablebase = load_tablebase('Connect4.db'))
+            ##Engine is built before the ai's first turn, so set its side from the players,
+            ##otherwise its first search would clear the table filled by pondering
+            ai.ai_board_index = self.players.index(Player_Type.ai)
+            ##Searches the human's possible replies while they decide
+            ponderer = Ponderer(self.ai_strength, ai.transposition_table, ai.move_ordering,
+                tablebase = ai.tablebase)
+
         ##Main loop for game window
         return_code = None
-        ##While turns are continuing
-        while return_code == None:
-            ##Human turn
-            if self.players[board.get_counter() % 2] == Player_Type.human:
-                return_code = self.game_loop(board, game_surface)
-            ##AI turn
-            else:
-                ai = Minimax(board.get_move_history(), self.ai_strength)
-                move = ai.search()
-                self.play_move(move, board, game_surface)
-                return_code = self.terminal_check(board, game_surface)
+        try:
+            ##While turns are continuing
+            while return_code == None:
+                ##Human turn
+                if self.players[board.get_counter() % 2] == Player_Type.human:
+                    if ponderer is not None:
+                        ponderer.start(board.get_move_history())
+                    return_code = self.game_loop(board, game_surface)
+                    if ponderer is not None:
+                        ponderer.stop()
+                ##AI turn
+                else:
+                    pondered = ponderer.get_result(board.get_move_history())
+                    if pondered is not None and pondered[1] >= self.ai_strength:
+                        ##Reply was already searched to full strength
+                        move = pondered[0]
+                    else:
+                        ##Engine only plays the moves made since its last search
+                        ai.set_position(board.get_move_history())
+                        move = self.ai_turn(ai)
+                        ponderer.move_ordering = ai.move_ordering
+                    if move is None:
+                        ##Search cancelled by the menu button, wait for a menu option
+                        return_code = self.game_loop(board, game_surface)
+                    elif move not in range(7):
+                        ##Search cancelled by a menu option
+                        return_code = move
+                    else:
+                        self.play_move(move, board, game_surface)
+                        return_code = self.terminal_check(board, game_surface)
+        finally:
+            if ai is not None:
+                ##Release the shared memory block, even if the game loop fails
+                ponderer.stop()
+                ai.transposition_table.close()
+        return return_code
 
+    def ai_turn(self, ai : Minimax) -> int:
+        """Runs the ai's search in a separate process,
+        keeping the window responsive and showing progress until it finishes
+        Pressing the menu button or any menu option cancels the search
 
-        return return_code
+        Args:
+            ai (Minimax): Engine kept for the game, in the current position
+
+        Returns:
+            int: Move found, None if cancelled by the menu button,
+                or the code of the menu option that cancelled it
+        """
+        ##Strength caps the depth, time limit bounds the response
+        search = AsyncSearch(ai, AI_TIME_LIMIT)
+        search.start()
+        shown_depth = None
+        while not search.poll():
+            self.update_active_buttons()
+            ##Only redraw progress when a new iteration completes
+            if search.depth != shown_depth:
+                shown_depth = search.depth
+                self.show_search_progress(search)
+            for event in pygame.event.get():
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    for button in self.active_buttons:
+                        code = button.check_click(event, self.window, self.base_theme)
+                        if code == 'menu':
+                            search.cancel()
+                            button.clear(self.window, self.base_theme)
+                            self.active_buttons.remove(button)
+                            self.menu_options()
+                            self.clear_search_progress()
+                            return None
+                        ##Menu option selected, as the menu may have been opened last turn
+                        elif code != None and code not in range(7):
+                            search.cancel()
+                            self.clear_search_progress()
+                            return code
+            pygame.time.wait(10) ##Leave the cpu to the search process
+        self.clear_search_progress()
+        return search.best_move
+
+    def show_search_progress(self, search : AsyncSearch):
+        """Shows the progress of the ai's search below the board
+
+        Args:
+            search (AsyncSearch): Search in progress
+        """
+        if search.depth < 0:
+            label = "Thinking..."
+        else:
+            label = f"Thinking... depth {search.depth}, best column {search.best_move + 1}"
+        font = pygame.font.SysFont('rockwell', 15)
+        surface = font.render(label, False, BLACK)
+        self.clear_search_progress()
+        x = (self.window.get_width() / 2) - (surface.get_width() / 2)
+        self.window.blit(surface, (x, 360))
+        pygame.display.flip()
+
+    def clear_search_progress(self):
+        """Clears the search progress text
+        """
+        self.window.fill(self.base_theme, pygame.Rect(125, 355, 350, 40))
+        pygame.display.flip()
 
     def game_loop(self, board : Board, game_surface : pygame.Surface):
         """Runs the game while checking all button clicks
@@ -1,13 +1,15 @@
 from board import Board
-from auxiliary import Status, Save_Type, get_confirmation, Main_Menu_Choice, Load_Menu_Choice, Player_Type
+from auxiliary import Status, Save_Type, get_confirmation, Main_Menu_Choice, Load_Menu_Choice, Player_Type, AI_TIME_LIMIT
 from storage import save, load, select_file, traverse_game
 from interface import Interface
 from ai import Minimax
+from tablebase import load_tablebase
 
 class Main:
 
     def __init__(self):
         self.board = Board()
+        self.ai = None ##Engine kept between turns of a game, created on the ai's first turn
 
     def turn(self):
         """Play through a turn in the game
@@ -29,8 +31,10 @@ class Main:
                             ##Get confirmation of decision to save
                             confirmed = get_confirmation()
                             if confirmed:
-                                save(Save_Type.position, self.board, "Connect4.db")
-                                print("Position saved\n")
+                                if save(Save_Type.position, self.board, "Connect4.db"):
+                                    print("Position saved\n")
+                                else:
+                                    print("Position already saved\n")
                             else:
                                 print("Position not saved, continue game\n")
                 except:
@@ -39,11 +43,15 @@ class Main:
         if self.players[self.board.get_counter()%2] == Player_Type.human:
             column = self.input() ##Accept move input from human player
         elif self.players[self.board.get_counter()%2] == Player_Type.ai:
-            ##Currently working at a fixed depth of 6
-            ai = Minimax(self.board.get_move_history(), 6)
-            column = ai.search()
+            if self.ai is None:
+                self.ai = Minimax(self.board.get_move_history(), 42, book_database = "Connect4.db",
+                    tablebase = load_tablebase("Connect4.db"))
+            ##Search as deep as the time limit allows
+            column = self.ai.iterative_search(time_limit = AI_TIME_LIMIT)
 
         self.board.make_move(column) ##Play move in the board
+        if self.ai is not None:
+            self.ai.play_move(column) ##Keep the engine's board in step
 
         current_state = self.board.game_over() ##Determine current board state
         if current_state == Status.game_won: ##Last move won the game
@@ -105,6 +113,7 @@ class Main:
         """
         self.board.reset()
         self.players = None
+        self.ai = None
 
     def main(self):
         """Main function controlling the usage of components of the application
@@ -0,0 +1,134 @@
+from board import BOTTOM_MASKS, COLUMN_MASKS, winning_squares
+
+##Columns from the centre outwards
+CENTRE_ORDER = (3,2,4,1,5,0,6)
+
+class CentreOrdering:
+    """Orders moves by distance from the centre column, as Minimax.naive_move_sort
+    Learns nothing from the search
+    """
+
+    def order(self, board, moves : list, tt_move : int) -> list:
+        """Orders the moves in a position for searching
+
+        Args:
+            board (CompactBoard): Board in the position being searched
+            moves (list): Moves to order
+            tt_move (int): Best move from the transposition table, -1 if none
+
+        Returns:
+            list: Ordered moves
+        """
+        ordered_moves = [col for col in CENTRE_ORDER if col in moves]
+        ##Search the stored best move first
+        if tt_move in ordered_moves:
+            ordered_moves.remove(tt_move)
+            ordered_moves.insert(0, tt_move)
+        return ordered_moves
+
+    def record_cutoff(self, board, move : int, remaining : int):
+        """Records a move that caused a cutoff
+
+        Args:
+            board (CompactBoard): Board in the position the move was played from
+            move (int): Column of the move
+            remaining (int): Depth left to search below the position
+        """
+        pass
+
+    def new_search(self):
+        """Called once at the start of each search
+        """
+        pass
+
+class HistoryOrdering(CentreOrdering):
+    """Orders moves using killer moves and a history table
+    Killers are kept for each move number rather than each search depth,
+    so both tables stay valid between iterations and between turns in a game
+    """
+
+    def __init__(self):
+        self.killers = [[-1,-1] for i in range(42)] ##Two killer moves for each move number
+        self.history = [[0]*49, [0]*49] ##Cutoff scores for each player and cell
+
+    def order(self, board, moves : list, tt_move : int) -> list:
+        """Orders the moves in a position for searching
+        Transposition table move, then killers, then history score,
+        with distance from the centre breaking ties
+
+        Args:
+            board (CompactBoard): Board in the position being searched
+            moves (list): Moves to order
+            tt_move (int): Best move from the transposition table, -1 if none
+
+        Returns:
+            list: Ordered moves
+        """
+        counter = board.get_counter()
+        killers = self.killers[counter]
+        history = self.history[counter & 1]
+        scores = {}
+        for col in moves:
+            if col == tt_move:
+                scores[col] = 3 << 40
+            elif col == killers[0]:
+                scores[col] = 2 << 40
+            elif col == killers[1]:
+                scores[col] = 1 << 40
+            else:
+                scores[col] = history[board.get_height(col)]
+        ##Stable sort keeps centre order for ties
+        return sorted([col for col in CENTRE_ORDER if col in scores], key = lambda x : -scores[x])
+
+    def record_cutoff(self, board, move : int, remaining : int):
+        """Records a move that caused a cutoff as a killer,
+        and rewards it in the history table, more so for deeper searches
+
+        Args:
+            board (CompactBoard): Board in the position the move was played from
+            move (int): Column of the move
+            remaining (int): Depth left to search below the position
+        """
+        counter = board.get_counter()
+        killers = self.killers[counter]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[counter & 1][board.get_height(move)] += remaining * remaining
+
+    def new_search(self):
+        """Halves the history scores, so older searches count for less
+        """
+        for history in self.history:
+            for i in range(len(history)):
+                history[i] >>= 1
+
+class ThreatOrdering(CentreOrdering):
+    """Orders moves by how many new winning cells they create for the player moving,
+    with distance from the centre breaking ties
+    """
+
+    def order(self, board, moves : list, tt_move : int) -> list:
+        """Orders the moves in a position for searching
+
+        Args:
+            board (CompactBoard): Board in the position being searched
+            moves (list): Moves to order
+            tt_move (int): Best move from the transposition table, -1 if none
+
+        Returns:
+            list: Ordered moves
+        """
+        current = board.get_bitboard(board.get_counter() & 1)
+        mask = board.get_mask()
+        existing = winning_squares(current, mask)
+        scores = {}
+        for col in moves:
+            if col == tt_move:
+                scores[col] = 64 ##More than any number of cells
+            else:
+                move = (mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col]
+                created = winning_squares(current | move, mask | move) & ~existing
+                scores[col] = created.bit_count()
+        ##Stable sort keeps centre order for ties
+        return sorted([col for col in CENTRE_ORDER if col in scores], key = lambda x : -scores[x])
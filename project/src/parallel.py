@@ -0,0 +1,217 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import Value, cpu_count
+from math import inf
+from time import perf_counter
+from ai import Minimax, Negamax, SearchTimeout
+from transposition import SharedTranspositionTable
+
+##Set in each worker process by init_worker
+_shared_alpha = None
+_worker_table = None
+
+def init_worker(shared_alpha):
+    """Stores the shared root bound in a worker process
+
+    Args:
+        shared_alpha (multiprocessing.Value): Best evaluation found at the root so far
+    """
+    global _shared_alpha
+    _shared_alpha = shared_alpha
+
+class AlphaWatch:
+    """Stands in for a search's stop event, set once another worker raises
+    the shared root bound above the alpha a root move is being searched with
+    The search checks it with its budget, every 1024 nodes
+    """
+
+    def __init__(self, shared_alpha):
+        """Constructor method for an alpha watch
+
+        Args:
+            shared_alpha (multiprocessing.Value): Best evaluation found at the root so far
+        """
+        self.shared_alpha = shared_alpha
+        self.alpha = shared_alpha.value ##Alpha the root move is being searched with
+
+    def is_set(self) -> bool:
+        """Checks whether the shared root bound has been raised
+
+        Returns:
+            bool: Root move should be searched again with the new bound
+        """
+        return self.shared_alpha.value > self.alpha
+
+def search_root_move(engine : type, position : list, max_depth : int, move : int) -> tuple:
+    """Searches one root move in a worker process
+    Reads the best root evaluation found so far by any worker as alpha,
+    and publishes its own result if it improves on it
+    If another worker raises the bound during the search, the move is searched
+    again with the higher alpha, reusing the worker's transposition table
+
+    Args:
+        engine (type): Engine class with a search_move method
+        position (list): Move history of the root position
+        max_depth (int): Search depth
+        move (int): Root move to search
+
+    Returns:
+        tuple: Move, evaluation and the alpha it was searched with
+    """
+    global _worker_table
+    ai = engine(position, max_depth, _worker_table)
+    ##Keep the table for later moves searched by this worker
+    _worker_table = ai.transposition_table
+
+    watch = AlphaWatch(_shared_alpha)
+    ai.stop_event = watch
+    while True:
+        try:
+            move_eval = ai.search_move(move, watch.alpha)
+            break
+        except SearchTimeout:
+            ##Abandoned search leaves moves on the board
+            while ai.board.get_counter() > ai.root_counter:
+                ai.board.undo_move()
+            watch.alpha = _shared_alpha.value
+    alpha = watch.alpha
+    with _shared_alpha.get_lock():
+        if move_eval > _shared_alpha.value:
+            _shared_alpha.value = move_eval
+    return move, move_eval, alpha
+
+def parallel_search(position : list, max_depth : int, workers : int = None,
+        engine : type = Negamax) -> int:
+    """Spreads the root moves of a search across a process pool
+    The first move is searched alone so the others start with a useful alpha
+
+    Args:
+        position (list): Move history of the root position
+        max_depth (int): Search depth
+        workers (int, optional): Number of processes, defaults to the core count
+        engine (type, optional): Engine class to search with
+
+    Returns:
+        int: Best move in the position
+    """
+    ai = engine(position, max_depth)
+    ordered_moves = ai.naive_move_sort(ai.root_moves())
+
+    shared_alpha = Value('d', -inf)
+    results = {}
+    with ProcessPoolExecutor(max_workers = workers, initializer = init_worker,
+            initargs = (shared_alpha,)) as pool:
+        first = pool.submit(search_root_move, engine, position, max_depth, ordered_moves[0])
+        move, move_eval, alpha = first.result()
+        results[move] = (move_eval, alpha)
+
+        pending = {pool.submit(search_root_move, engine, position, max_depth, move)
+            for move in ordered_moves[1:]}
+        while pending:
+            done, pending = wait(pending, return_when = FIRST_COMPLETED)
+            for future in done:
+                move, move_eval, alpha = future.result()
+                results[move] = (move_eval, alpha)
+
+    ##Only evaluations above the alpha they were searched with are exact
+    best_move = ordered_moves[0]
+    best_eval = results[best_move][0]
+    for move in ordered_moves[1:]:
+        move_eval, alpha = results[move]
+        if move_eval > alpha and move_eval > best_eval:
+            best_eval = move_eval
+            best_move = move
+    return best_move
+
+def lazy_smp_worker(engine : type, position : list, max_depth : int,
+        table : SharedTranspositionTable, start_depth : int,
+        time_limit : float, node_limit : int) -> tuple:
+    """Runs an iterative deepening search in a worker process,
+    reading and filling the shared transposition table
+
+    Args:
+        engine (type): Engine class to search with
+        position (list): Move history of the root position
+        max_depth (int): Deepest iteration to search
+        table (SharedTranspositionTable): Table shared by all workers
+        start_depth (int): Depth of the worker's first iteration
+        time_limit (float): Wall-clock budget in seconds
+        node_limit (int): Budget of nodes searched
+
+    Returns:
+        tuple: Best move, deepest completed depth and nodes searched
+    """
+    ai = engine(position, max_depth, table)
+    move = ai.iterative_search(time_limit, node_limit, start_depth)
+    table.close()
+    return move, ai.completed_depth, ai.nodes
+
+def lazy_smp_search(position : list, max_depth : int, workers : int = None,
+        time_limit : float = None, node_limit : int = None, engine : type = Minimax) -> int:
+    """Lazy SMP search, every worker searches the whole position
+    Workers start at staggered depths and share one transposition table,
+    so results found by one worker cut off searches in the others
+
+    Args:
+        position (list): Move history of the root position
+        max_depth (int): Deepest iteration to search
+        workers (int, optional): Number of processes, defaults to the core count
+        time_limit (float, optional): Wall-clock budget in seconds for each worker
+        node_limit (int, optional): Budget of nodes for each worker
+        engine (type, optional): Engine class to search with
+
+    Returns:
+        int: Best move of the worker that completed the deepest iteration
+    """
+    if workers is None:
+        workers = cpu_count()
+    table = SharedTranspositionTable()
+    try:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            ##Half the helpers start one ply deeper
+            futures = [pool.submit(lazy_smp_worker, engine, position, max_depth, table,
+                i % 2, time_limit, node_limit) for i in range(workers)]
+            results = [future.result() for future in futures]
+    finally:
+        table.close()
+
+    ##Earlier workers win ties, so the main worker is preferred
+    best_move, best_depth, nodes = results[0]
+    for move, depth, nodes in results[1:]:
+        if depth > best_depth:
+            best_move, best_depth = move, depth
+    return best_move
+
+def measure_speedup(position : list, max_depth : int, engine : type = Negamax):
+    """Prints the time taken by parallel_search for each number of workers
+    against a serial search of the same position
+
+    Args:
+        position (list): Move history of the root position
+        max_depth (int): Search depth
+        engine (type, optional): Engine class to search with
+    """
+    start = perf_counter()
+    serial_move = engine(position, max_depth).search()
+    serial_time = perf_counter() - start
+    print(f"serial     move {serial_move} time {serial_time:.2f}s")
+
+    workers = 1
+    while workers <= cpu_count():
+        start = perf_counter()
+        move = parallel_search(position, max_depth, workers, engine)
+        elapsed = perf_counter() - start
+        print(f"{workers:<2} workers move {move} time {elapsed:.2f}s speedup {serial_time / elapsed:.2f}x")
+        workers *= 2
+
+    workers = 1
+    while workers <= cpu_count():
+        start = perf_counter()
+        move = lazy_smp_search(position, max_depth, workers, engine = engine)
+        elapsed = perf_counter() - start
+        print(f"{workers:<2} lazy smp move {move} time {elapsed:.2f}s speedup {serial_time / elapsed:.2f}x")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    measure_speedup([3,3,2], 9)
+    measure_speedup([3,3,2], 9, Minimax)
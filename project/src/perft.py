@@ -0,0 +1,77 @@
+from argparse import ArgumentParser
+from time import perf_counter
+from board import Board, CompactBoard
+
+##Leaf counts for each depth from each reference position,
+##checked against an independent grid-based move generator
+##Games that end before the last ply are not counted or searched further
+PERFT_REFERENCE = {
+    () : [1, 7, 49, 343, 2401, 16807, 117649, 823536, 5673234],
+    (3,3,3,3,2,4) : [1, 7, 49, 342, 2292, 15830, 103363, 698683],
+    (3,2,3,3,4,4,1,2) : [1, 7, 49, 343, 2316, 15829, 104867, 697722],
+    (2,3,3,4,4,4,5,1,3,2,5,5) : [1, 7, 49, 343, 2188, 15249, 91182, 621869]
+}
+
+def perft(board, depth : int) -> int:
+    """Counts the positions reached after a number of moves, using only the board's
+    move generation, so the evaluator and search are not involved
+
+    Args:
+        board (Board): Board in the position to count from, left unchanged
+        depth (int): Moves to play
+
+    Returns:
+        int: Number of positions at the depth
+    """
+    if depth == 0:
+        return 1
+    leaves = 0
+    for move in board.retrieve_valid_moves():
+        board.make_move(move)
+        if depth == 1:
+            leaves += 1
+        elif not board.check_win() and board.get_counter() < 42:
+            leaves += perft(board, depth - 1)
+        board.undo_move()
+    return leaves
+
+def run_perft(board_class : type, position : tuple, depth : int) -> tuple:
+    """Times perft on a board class and checks the count against the reference
+
+    Args:
+        board_class (type): Board or CompactBoard
+        position (tuple): Moves representing the position
+        depth (int): Moves to play
+
+    Returns:
+        tuple: Leaf count, moves made per second and whether the count matches,
+            None if there is no reference value
+    """
+    board = board_class()
+    for move in position:
+        board.make_move(move)
+    start = perf_counter()
+    leaves = perft(board, depth)
+    elapsed = perf_counter() - start
+
+    ##Every position above the last ply was reached by one move
+    moves = leaves + sum(perft(board, d) for d in range(1, depth))
+    reference = PERFT_REFERENCE.get(tuple(position), [])
+    correct = reference[depth] == leaves if depth < len(reference) else None
+    return leaves, moves / elapsed, correct
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description = "Count positions to a depth to check move generation")
+    parser.add_argument('--depth', type = int, default = 6)
+    args = parser.parse_args()
+    failed = False
+    for board_class in [Board, CompactBoard]:
+        for position in PERFT_REFERENCE:
+            leaves, speed, correct = run_perft(board_class, position, args.depth)
+            status = {True : "ok", False : "MISMATCH", None : "no reference"}[correct]
+            failed = failed or correct is False
+            print(f"{board_class.__name__:<12} {str(list(position)):<40} depth {args.depth:<3} "
+                f"leaves {leaves:<10} {speed:.0f} moves/s  {status}")
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,104 @@
+from threading import Thread, Event
+from ai import Minimax, SearchTimeout
+from board import CompactBoard
+from auxiliary import Status
+from transposition import TranspositionTable
+from ordering import CentreOrdering
+
+class Ponderer:
+    """Searches the positions after each of the human's possible replies
+    in a background thread, while the human is deciding on their move
+    Shares its transposition table and move ordering with the ai's own searches,
+    so even unfinished pondering speeds up the real search
+    """
+
+    def __init__(self, max_depth : int, transposition_table : TranspositionTable,
+            move_ordering : CentreOrdering, engine : type = Minimax, tablebase = None):
+        """Constructor method for a ponderer
+
+        Args:
+            max_depth (int): Deepest iteration to ponder to
+            transposition_table (TranspositionTable): Table shared with the ai's searches
+            move_ordering (CentreOrdering): Move ordering shared with the ai's searches
+            engine (type, optional): Engine class to search with
+            tablebase (Tablebase, optional): Tablebase probed by the searches
+        """
+        self.max_depth = max_depth
+        self.transposition_table = transposition_table
+        self.move_ordering = move_ordering
+        self.engine = engine
+        self.tablebase = tablebase
+        self.thread = None
+        self.stop_event = Event()
+        self.results = {}
+
+    def start(self, position : list):
+        """Starts pondering the position, with the human to move
+
+        Args:
+            position (list): Move history of the current position
+        """
+        self.stop()
+        self.stop_event = Event()
+        self.results = {}
+        self.thread = Thread(target = self.ponder, args = (list(position),), daemon = True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops pondering and waits for the thread to finish
+        Must be called before the ai searches with the shared tables
+        """
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def get_result(self, position : list) -> tuple:
+        """Gets the pondered result for the position after the human's move
+
+        Args:
+            position (list): Move history including the human's move
+
+        Returns:
+            tuple: Best move and depth it was searched to, None if not pondered
+        """
+        return self.results.get(tuple(position))
+
+    def ponder(self, position : list):
+        """Deepens the search of every reply together, most likely replies first
+        Runs in the background thread until stopped or max_depth is reached
+
+        Args:
+            position (list): Move history of the current position
+        """
+        board = CompactBoard()
+        for move in position:
+            board.make_move(move)
+
+        engines = {}
+        root_moves = {}
+        for reply in CentreOrdering().order(board, board.retrieve_valid_moves(), -1):
+            board.make_move(reply)
+            ##Finished games leave nothing for the ai to search
+            if board.game_over() == Status.game_unfinished:
+                ai = self.engine(position + [reply], self.max_depth,
+                    self.transposition_table, move_ordering = self.move_ordering,
+                    tablebase = self.tablebase)
+                ai.stop_event = self.stop_event
+                engines[reply] = ai
+                root_moves[reply] = ai.naive_move_sort(ai.root_moves())
+            board.undo_move()
+
+        ##One session is one search, so history is aged and
+        ##the table's entries become old only once for the whole session
+        self.transposition_table.new_search()
+        self.move_ordering.new_search()
+        for depth in range(self.max_depth + 1):
+            for reply, ai in engines.items():
+                ai.max_search_depth = depth
+                try:
+                    move, move_evals = ai.search_root(root_moves[reply])
+                except SearchTimeout:
+                    return
+                root_moves[reply] = ai.reorder_root_moves(root_moves[reply], move, move_evals)
+                self.results[tuple(position + [reply])] = (move, depth)
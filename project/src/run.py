@@ -1,4 +1,6 @@
 from main import Main
 
-main = Main()
-main.main()
\ No newline at end of file
+##Guarded so worker processes used by the search do not start the application
+if __name__ == '__main__':
+    main = Main()
+    main.main()
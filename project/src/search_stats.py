@@ -0,0 +1,210 @@
+from argparse import ArgumentParser
+from cProfile import Profile
+from time import perf_counter
+from ai import Minimax, Negamax
+
+class CountingTable:
+    """Wraps a transposition table, counting probes, hits and stores
+    Only put in place while statistics are collected, so normal searches pay nothing
+    """
+
+    def __init__(self, table, statistics):
+        self.table = table
+        self.statistics = statistics
+
+    def probe(self, key : int):
+        """Probes the wrapped table, counting the probe and any hit
+        """
+        self.statistics.tt_probes += 1
+        entry = self.table.probe(key)
+        if entry is not None:
+            self.statistics.tt_hits += 1
+        return entry
+
+    def store(self, key : int, value : int, depth : int, flag : int, move : int):
+        """Stores in the wrapped table, counting the store
+        """
+        self.statistics.tt_stores += 1
+        self.table.store(key, value, depth, flag, move)
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+class CountingOrdering:
+    """Wraps a move ordering, counting expanded nodes and cutoffs
+    A cutoff by the first move searched means the ordering was right
+    """
+
+    def __init__(self, ordering, statistics):
+        self.ordering = ordering
+        self.statistics = statistics
+        self.first_moves = [-1]*43 ##First move searched at each move number
+
+    def order(self, board, moves : list, tt_move : int) -> list:
+        """Orders with the wrapped ordering, remembering the first move
+        """
+        self.statistics.expanded += 1
+        ordered_moves = self.ordering.order(board, moves, tt_move)
+        self.first_moves[board.get_counter()] = ordered_moves[0]
+        return ordered_moves
+
+    def record_cutoff(self, board, move : int, remaining : int):
+        """Records with the wrapped ordering, counting the cutoff
+        """
+        self.statistics.cutoffs += 1
+        if move == self.first_moves[board.get_counter()]:
+            self.statistics.first_move_cutoffs += 1
+        self.ordering.record_cutoff(board, move, remaining)
+
+    def __getattr__(self, name):
+        return getattr(self.ordering, name)
+
+class SearchStatistics:
+    """Statistics of one iterative deepening search
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.time = 0
+        self.expanded = 0 ##Nodes whose moves were searched
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_stores = 0
+        self.iterations = [] ##Depth, time and nodes of each completed iteration
+
+    def nodes_per_second(self) -> float:
+        """Search speed
+
+        Returns:
+            float: Nodes visited each second
+        """
+        return self.nodes / self.time if self.time > 0 else 0.0
+
+    def cutoff_rate(self) -> float:
+        """Beta-cutoff rate
+
+        Returns:
+            float: Fraction of expanded nodes that ended in a cutoff
+        """
+        return self.cutoffs / self.expanded if self.expanded else 0.0
+
+    def first_move_cutoff_rate(self) -> float:
+        """Quality of the move ordering
+
+        Returns:
+            float: Fraction of cutoffs caused by the first move searched
+        """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def tt_hit_rate(self) -> float:
+        """Transposition table hit rate
+
+        Returns:
+            float: Fraction of probes that found an entry
+        """
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def tt_store_rate(self) -> float:
+        """Transposition table store rate
+
+        Returns:
+            float: Stores for each node visited
+        """
+        return self.tt_stores / self.nodes if self.nodes else 0.0
+
+    def branching_factor(self) -> float:
+        """Effective branching factor, the growth in nodes between the last two iterations
+
+        Returns:
+            float: Nodes of the last iteration over nodes of the one before
+        """
+        if len(self.iterations) < 2 or self.iterations[-2][2] == 0:
+            return 0.0
+        return self.iterations[-1][2] / self.iterations[-2][2]
+
+    def report(self) -> dict:
+        """Collects every statistic, for printing or saving as JSON
+
+        Returns:
+            dict: Every statistic by name
+        """
+        return {
+            'nodes' : self.nodes,
+            'time' : self.time,
+            'nodes_per_second' : self.nodes_per_second(),
+            'cutoff_rate' : self.cutoff_rate(),
+            'first_move_cutoff_rate' : self.first_move_cutoff_rate(),
+            'tt_hit_rate' : self.tt_hit_rate(),
+            'tt_store_rate' : self.tt_store_rate(),
+            'branching_factor' : self.branching_factor(),
+            'iterations' : [{'depth' : depth, 'time' : time, 'nodes' : nodes}
+                for depth, time, nodes in self.iterations]
+        }
+
+    def __str__(self) -> str:
+        lines = [f"nodes {self.nodes} in {self.time:.2f}s ({self.nodes_per_second():.0f}/s)",
+            f"cutoffs {self.cutoff_rate():.1%} of expanded nodes, "
+            f"{self.first_move_cutoff_rate():.1%} by the first move",
+            f"tt hits {self.tt_hit_rate():.1%} of probes, {self.tt_store_rate():.2f} stores per node",
+            f"branching factor {self.branching_factor():.2f}"]
+        for depth, time, nodes in self.iterations:
+            lines.append(f"  depth {depth:<3} nodes {nodes:<10} time {time:.3f}s")
+        return "\n".join(lines)
+
+def search_with_statistics(ai : Minimax, time_limit : float = None, node_limit : int = None,
+        profile_path : str = None) -> tuple:
+    """Runs an iterative deepening search while collecting statistics
+    The engine's tables are wrapped for the one search, its hot loop is unchanged
+
+    Args:
+        ai (Minimax): Engine to search with
+        time_limit (float, optional): Wall-clock budget in seconds
+        node_limit (int, optional): Budget of nodes searched
+        profile_path (str, optional): File to dump cProfile output to, not profiled if None
+
+    Returns:
+        tuple: Best move and the SearchStatistics of the search
+    """
+    statistics = SearchStatistics()
+    table = ai.transposition_table
+    ordering = ai.move_ordering
+    ai.transposition_table = CountingTable(table, statistics)
+    ai.move_ordering = CountingOrdering(ordering, statistics)
+
+    iteration_start = [perf_counter(), 0] ##Time and nodes at the start of the iteration
+    def progress(depth, move, score):
+        now = perf_counter()
+        statistics.iterations.append((depth, now - iteration_start[0], ai.nodes - iteration_start[1]))
+        iteration_start[:] = [now, ai.nodes]
+
+    profiler = Profile() if profile_path is not None else None
+    start = perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        move = ai.iterative_search(time_limit, node_limit, progress = progress)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        statistics.time = perf_counter() - start
+        statistics.nodes = ai.nodes
+        ai.transposition_table = table
+        ai.move_ordering = ordering
+    return move, statistics
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description = "Search a position and print statistics of the search")
+    parser.add_argument('moves', nargs = '*', type = int, help = "columns played, from 0")
+    parser.add_argument('--depth', type = int, default = 8)
+    parser.add_argument('--engine', choices = ['minimax', 'negamax'], default = 'minimax')
+    parser.add_argument('--profile', help = "file to dump cProfile output to")
+    args = parser.parse_args()
+    engine = Negamax if args.engine == 'negamax' else Minimax
+    move, statistics = search_with_statistics(engine(args.moves, args.depth),
+        profile_path = args.profile)
+    print(f"best move {move}")
+    print(statistics)
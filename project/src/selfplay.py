@@ -0,0 +1,137 @@
+import random
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+from ai import Minimax, Negamax
+from board import CompactBoard
+from auxiliary import Status, Save_Type
+from storage import save_many
+from transposition import TranspositionTable
+
+ENGINES = {'minimax' : Minimax, 'negamax' : Negamax}
+
+def random_opening(rng : random.Random, plies : int) -> list:
+    """Plays random moves for the start of a game, retrying if the game ends
+
+    Args:
+        rng (random.Random): Seeded generator
+        plies (int): Number of random moves
+
+    Returns:
+        list: Move history of the opening
+    """
+    while True:
+        board = CompactBoard()
+        for i in range(plies):
+            board.make_move(rng.choice(board.retrieve_valid_moves()))
+            if board.game_over() != Status.game_unfinished:
+                break
+        else:
+            return list(board.get_move_history())
+
+def play_game(seed : int, engine : type, depth : int, opening_plies : int,
+        node_limit : int, table_memory : int) -> list:
+    """Plays one ai against ai game in a worker process
+    Each side keeps its own engine for the game, as Minimax tables belong to one side
+    Searches are bounded by depth and nodes, not time, so a seed always gives the same game
+
+    Args:
+        seed (int): Seed for the random opening
+        engine (type): Engine class for both sides
+        depth (int): Search depth for each move
+        opening_plies (int): Random moves before the engines take over
+        node_limit (int): Budget of nodes for each move, or None
+        table_memory (int): Transposition table memory for each side in bytes
+
+    Returns:
+        list: Move history of the finished game
+    """
+    board = CompactBoard()
+    for move in random_opening(random.Random(seed), opening_plies):
+        board.make_move(move)
+    ais = [None, None]
+    while board.game_over() == Status.game_unfinished:
+        side = board.get_counter() & 1
+        if ais[side] is None:
+            ais[side] = engine(board.get_move_history(), depth, TranspositionTable(table_memory))
+        else:
+            ais[side].set_position(board.get_move_history())
+        board.make_move(ais[side].iterative_search(node_limit = node_limit))
+    return list(board.get_move_history())
+
+def game_result(history : list) -> int:
+    """Result of a finished game, for the opening statistics
+
+    Args:
+        history (list): Move history of a finished game
+
+    Returns:
+        int: 0 if the first player won, 1 if the second player won, 2 for a draw
+    """
+    board = CompactBoard()
+    for move in history:
+        board.make_move(move)
+    if board.game_over() == Status.game_drawn:
+        return 2
+    return (len(history) - 1) & 1
+
+def self_play(games : int, database : str, workers : int = None, engine : str = 'negamax',
+        depth : int = 6, opening_plies : int = 4, node_limit : int = None,
+        batch_size : int = 500, seed : int = 0, table_memory : int = 2**20) -> float:
+    """Plays games across a process pool and saves them to the database in batches
+
+    Args:
+        games (int): Number of games to play
+        database (str): Database to use
+        workers (int, optional): Number of processes, defaults to the core count
+        engine (str, optional): Key of ENGINES to play with
+        depth (int, optional): Search depth for each move
+        opening_plies (int, optional): Random moves at the start of each game
+        node_limit (int, optional): Budget of nodes for each move
+        batch_size (int, optional): Games saved in each transaction
+        seed (int, optional): Seed of the first game, each game uses the next
+        table_memory (int, optional): Transposition table memory for each side in bytes
+
+    Returns:
+        float: Games played each second
+    """
+    worker = partial(play_game, engine = ENGINES[engine], depth = depth,
+        opening_plies = opening_plies, node_limit = node_limit, table_memory = table_memory)
+    results = [0, 0, 0]
+    batch = []
+    saved = 0
+    start = perf_counter()
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        ##Chunks keep the cost of sending games between processes low
+        for history in pool.map(worker, range(seed, seed + games), chunksize = 8):
+            results[game_result(history)] += 1
+            batch.append(history)
+            if len(batch) == batch_size:
+                saved += save_many(Save_Type.game, batch, database)
+                batch = []
+                print(f"{saved}/{games} games saved ({saved / (perf_counter() - start):.2f} games/s)")
+    if batch:
+        saved += save_many(Save_Type.game, batch, database)
+    elapsed = perf_counter() - start
+
+    rate = saved / elapsed
+    print(f"{saved} games in {elapsed:.1f}s ({rate:.2f} games/s)")
+    print(f"first player {results[0]}, second player {results[1]}, drawn {results[2]}")
+    return rate
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description = "Play ai against ai games and save them")
+    parser.add_argument('--games', type = int, default = 1000)
+    parser.add_argument('--workers', type = int, help = "processes to use, defaults to the core count")
+    parser.add_argument('--engine', choices = list(ENGINES), default = 'negamax')
+    parser.add_argument('--depth', type = int, default = 6, help = "search depth for each move")
+    parser.add_argument('--opening', type = int, default = 4, help = "random moves at the start of each game")
+    parser.add_argument('--nodes', type = int, help = "node budget for each move")
+    parser.add_argument('--batch', type = int, default = 500, help = "games saved in each transaction")
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--database', default = "Connect4.db")
+    args = parser.parse_args()
+    self_play(args.games, args.database, args.workers, args.engine, args.depth, args.opening,
+        args.nodes, args.batch, args.seed)
@@ -9,12 +9,57 @@ CREATE TABLE store
 (
 fileID INTEGER,
 filetype INTEGER,
-data TEXT,
+data BLOB,
+positionKey INTEGER,
 primary key (fileID)
 )
 """
+##Saved positions are unique by canonical key, games leave positionKey empty
+create_position_key_index = """
+CREATE UNIQUE INDEX store_position_key ON store (positionKey) WHERE filetype = 1
+"""
+##Data holds move histories packed by storage.encode_history
+
+##Define the position index, every position key reached in each saved game
+create_position_index = """
+CREATE TABLE position_index
+(
+positionKey INTEGER,
+fileID INTEGER,
+primary key (positionKey, fileID)
+) WITHOUT ROWID
+"""
 ##sqlite3 will autoincrement integer primary keys
 
+##Define the opening book table, filled by generate_book.py
+##Positions are keyed by their canonical (mirror-normalised) key
+create_book = """
+CREATE TABLE book
+(
+positionKey INTEGER,
+move INTEGER,
+score INTEGER,
+depth INTEGER,
+primary key (positionKey)
+)
+"""
+
+##Define the endgame tablebase, filled by tablebase.py
+##Exact scores for the player to move, keyed by canonical key
+create_tablebase = """
+CREATE TABLE tablebase
+(
+positionKey INTEGER,
+stones INTEGER,
+score INTEGER,
+primary key (positionKey)
+) WITHOUT ROWID
+"""
+
 cursor.execute(create_store)
+cursor.execute(create_position_key_index)
+cursor.execute(create_book)
+cursor.execute(create_position_index)
+cursor.execute(create_tablebase)
 connection.commit()
 connection.close()
\ No newline at end of file
@@ -1,11 +1,113 @@
+import os
 import sqlite3
+import threading
 from auxiliary import Save_Type
-from board import Board
+from board import Board, CompactBoard
 ##from interface import Interface
 from auxiliary import get_confirmation
 from prettytable import PrettyTable
 
-def save(file_type : Save_Type, board : Board, database : str):
+##Same definition as in setup.py, for databases created without it
+##Data is a packed BLOB from encode_history, rows saved before that are digit strings
+create_store = """
+CREATE TABLE IF NOT EXISTS store
+(
+fileID INTEGER,
+filetype INTEGER,
+data BLOB,
+positionKey INTEGER,
+primary key (fileID)
+)
+"""
+##Loads select by filetype, so they stay fast with millions of rows
+create_store_index = """
+CREATE INDEX IF NOT EXISTS store_filetype ON store (filetype)
+"""
+##Saved positions are unique by canonical key, so a position and its mirror image are saved once
+create_position_key_index = f"""
+CREATE UNIQUE INDEX IF NOT EXISTS store_position_key ON store (positionKey)
+WHERE filetype = {Save_Type.position}
+"""
+##Every position key reached in each saved game, to find games through a position
+create_position_index = """
+CREATE TABLE IF NOT EXISTS position_index
+(
+positionKey INTEGER,
+fileID INTEGER,
+primary key (positionKey, fileID)
+) WITHOUT ROWID
+"""
+##Opening book, filled by generate_book.py
+##Positions are keyed by their canonical (mirror-normalised) key
+create_book = """
+CREATE TABLE IF NOT EXISTS book
+(
+positionKey INTEGER,
+move INTEGER,
+score INTEGER,
+depth INTEGER,
+primary key (positionKey)
+)
+"""
+##Endgame tablebase, filled by tablebase.py
+##Exact scores for the player to move, on the same scale as Solver, keyed by canonical key
+create_tablebase = """
+CREATE TABLE IF NOT EXISTS tablebase
+(
+positionKey INTEGER,
+stones INTEGER,
+score INTEGER,
+primary key (positionKey)
+) WITHOUT ROWID
+"""
+
+##Open connections of each thread, by database
+_connections = threading.local()
+
+def get_connection(database : str) -> sqlite3.Connection:
+    """Gets this thread's connection to a database, opening it on first use
+    Connections are reused so each call does not pay to connect,
+    and sqlite3 keeps each connection's prepared statements cached
+    A process started by fork opens its own connections rather than sharing its parent's
+
+    Args:
+        database (str): Database to use
+
+    Returns:
+        sqlite3.Connection: Open connection
+    """
+    connections = getattr(_connections, 'connections', None)
+    if connections is None or _connections.pid != os.getpid():
+        connections = _connections.connections = {}
+        _connections.pid = os.getpid()
+    conn = connections.get(database)
+    if conn is None:
+        conn = sqlite3.connect(database)
+        ##Write-ahead log lets readers continue during writes, and commits only append
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(create_store)
+        ##Stores created before positions were deduplicated have no positionKey column
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(store)")]
+        if 'positionKey' not in columns:
+            conn.execute("ALTER TABLE store ADD COLUMN positionKey INTEGER")
+        conn.execute(create_store_index)
+        conn.execute(create_position_key_index)
+        conn.execute(create_position_index)
+        conn.execute(create_book)
+        conn.execute(create_tablebase)
+        conn.commit()
+        connections[database] = conn
+    return conn
+
+def close_connections():
+    """Closes this thread's connections, they are reopened when next used
+    """
+    for conn in getattr(_connections, 'connections', {}).values():
+        conn.close()
+    _connections.connections = {}
+
+def save(file_type : Save_Type, board : Board, database : str) -> int:
     """Saves a position or game to the database
     Functionality will be altered when account system is added
 
@@ -13,13 +115,80 @@ def save(file_type : Save_Type, board : Board, database : str):
         file_type (Save_Type): Position or game
         board (Board): Current instance of board
         database (string): Database to use
+
+    Returns:
+        int: 1 if saved, 0 if the position or its mirror image was already saved
     """
-    moves = board.get_move_history() ##Extract game or position representation
-    moves = convert_history(moves) ##Convert into string representation for storage
-    sql_command = f"""
-    INSERT INTO store (filetype, data) VALUES ({file_type}, '{moves}')
+    return save_many(file_type, [board.get_move_history()], database)
+
+def save_many(file_type : Save_Type, histories, database : str) -> int:
+    """Saves many positions or games to the database in one transaction
+    Games are added to the position index as they are saved,
+    positions are skipped if they or their mirror image are already saved
+
+    Args:
+        file_type (Save_Type): Position or game
+        histories (iterable): Move histories to save, may be a generator
+        database (str): Database to use
+
+    Returns:
+        int: Number of rows saved
     """
-    execute_sql(sql_command, database)
+    conn = get_connection(database)
+    saved = 0
+    with conn: ##Commits once at the end, or rolls back every row on error
+        for moves in histories:
+            if file_type == Save_Type.position:
+                cursor = conn.execute("INSERT OR IGNORE INTO store (filetype, data, positionKey) VALUES (?, ?, ?)",
+                    (file_type, encode_history(moves), canonical_position_key(moves)))
+                saved += cursor.rowcount
+            else:
+                cursor = conn.execute("INSERT INTO store (filetype, data) VALUES (?, ?)",
+                    (file_type, encode_history(moves)))
+                index_game(conn, cursor.lastrowid, moves)
+                saved += 1
+    return saved
+
+def index_game(conn : sqlite3.Connection, file_id : int, moves : list):
+    """Adds the positions reached in a game to the position index
+
+    Args:
+        conn (sqlite3.Connection): Connection in the saving transaction
+        file_id (int): fileID of the game in store
+        moves (list): Move history of the game
+    """
+    conn.executemany("INSERT OR IGNORE INTO position_index (positionKey, fileID) VALUES (?, ?)",
+        ((key, file_id) for key in position_keys(moves)))
+
+def position_keys(moves : list) -> list:
+    """Keys of the positions after each move of a history
+
+    Args:
+        moves (list): Move history
+
+    Returns:
+        list: Position key after each move
+    """
+    board = CompactBoard()
+    keys = []
+    for move in moves:
+        board.make_move(move)
+        keys.append(board.get_key())
+    return keys
+
+def canonical_position_key(moves : list) -> int:
+    """Key shared by the position after a history and its mirror image
+
+    Args:
+        moves (list): Move history
+
+    Returns:
+        int: Canonical key of the position
+    """
+    board = CompactBoard()
+    for move in moves:
+        board.make_move(move)
+    return board.get_canonical_key()[0]
 
 def load(file_type : Save_Type, database : str) -> list:
     """Loads a position or game from the database
@@ -32,11 +201,141 @@ def load(file_type : Save_Type, database : str) -> list:
     Returns:
         list: All retrieved positions or games
     """
-    sql_command = f"""
-    SELECT data FROM store WHERE filetype = {file_type}
+    return list(load_iter(file_type, database))
+
+def load_iter(file_type : Save_Type, database : str, batch_size : int = 1000):
+    """Streams positions or games from the database,
+    fetching rows from the cursor in batches rather than all at once
+
+    Args:
+        file_type (Save_Type): Position or game
+        database (str): Database to use
+        batch_size (int, optional): Rows fetched at a time
+
+    Yields:
+        str: Each retrieved position or game, as a string of digits
+    """
+    for data in stream_rows("SELECT data FROM store WHERE filetype = ?", (file_type,),
+            database, batch_size):
+        yield convert_history(read_history(data))
+
+def games_through(position : list, database : str, batch_size : int = 1000):
+    """Streams the saved games that pass through a position,
+    looked up in the position index rather than replaying every game
+
+    Args:
+        position (list): Move history of the position
+        database (str): Database to use
+        batch_size (int, optional): Rows fetched at a time
+
+    Yields:
+        list: Move history of each game through the position
+    """
+    board = CompactBoard()
+    for move in position:
+        board.make_move(move)
+    command = """
+    SELECT store.data FROM position_index JOIN store ON store.fileID = position_index.fileID
+    WHERE position_index.positionKey = ?
+    """
+    for data in stream_rows(command, (board.get_key(),), database, batch_size):
+        yield read_history(data)
+
+def stream_rows(command : str, parameters : tuple, database : str, batch_size : int):
+    """Streams the first column of a query's rows from the cursor in batches
+
+    Args:
+        command (str): sqlite3 query, with ? for each parameter
+        parameters (tuple): Values for the query's parameters
+        database (str): Database to use
+        batch_size (int): Rows fetched at a time
+
+    Yields:
+        Value of the first column of each row
+    """
+    cursor = get_connection(database).execute(command, parameters)
+    try:
+        rows = cursor.fetchmany(batch_size)
+        while rows:
+            for row in rows:
+                yield row[0]
+            rows = cursor.fetchmany(batch_size)
+    finally:
+        cursor.close()
+
+def rebuild_position_index(database : str) -> int:
+    """Packs any digit string rows saved before encode_history,
+    keys saved positions and removes repeats of the same position,
+    and indexes every saved game again
+
+    Args:
+        database (str): Database to use
+
+    Returns:
+        int: Number of games indexed
+    """
+    conn = get_connection(database)
+    rows = conn.execute("SELECT fileID, filetype, data FROM store").fetchall()
+    games = 0
+    position_keys_seen = set()
+    with conn:
+        conn.execute("DELETE FROM position_index")
+        conn.execute("UPDATE store SET positionKey = NULL")
+        for file_id, file_type, data in rows:
+            moves = read_history(data)
+            if file_type == Save_Type.position:
+                key = canonical_position_key(moves)
+                if key in position_keys_seen:
+                    conn.execute("DELETE FROM store WHERE fileID = ?", (file_id,))
+                    continue
+                position_keys_seen.add(key)
+                conn.execute("UPDATE store SET positionKey = ? WHERE fileID = ?", (key, file_id))
+            if isinstance(data, str):
+                conn.execute("UPDATE store SET data = ? WHERE fileID = ?", (encode_history(moves), file_id))
+            if file_type == Save_Type.game:
+                index_game(conn, file_id, moves)
+                games += 1
+    return games
+
+def encode_history(moves : list) -> bytes:
+    """Packs a move history into bytes, 3 bits per move after a byte holding the length
+    A full game of 42 moves takes 17 bytes
+
+    Args:
+        moves (list): Integer list of moves played
+
+    Returns:
+        bytes: Packed history
+    """
+    packed = 0
+    for i, move in enumerate(moves):
+        packed |= move << 3*i
+    return bytes([len(moves)]) + packed.to_bytes((3*len(moves) + 7) // 8, 'little')
+
+def decode_history(data : bytes) -> list:
+    """Unpacks a move history packed by encode_history
+
+    Args:
+        data (bytes): Packed history
+
+    Returns:
+        list: Integer list of moves played
+    """
+    packed = int.from_bytes(data[1:], 'little')
+    return [(packed >> 3*i) & 7 for i in range(data[0])]
+
+def read_history(data) -> list:
+    """Reads a stored history, packed or a digit string saved before packing
+
+    Args:
+        data (bytes or str): Value of a data column
+
+    Returns:
+        list: Integer list of moves played
     """
-    result = execute_sql(sql_command, database)
-    return [file[0] for file in result]
+    if isinstance(data, str):
+        return revert_history(data)
+    return decode_history(data)
 
 def convert_history(moves: list) -> str:
     """Converts the board's representation of the the move history into a string
@@ -60,19 +359,20 @@ def revert_history(file : str) -> list:
     """
     return [int(i) for i in file]
 
-def execute_sql(command : str, database : str) -> sqlite3.Cursor:
-    """Executes an sql command using sqlite3
+def execute_sql(command : str, database : str, parameters : tuple = ()) -> sqlite3.Cursor:
+    """Executes an sql command using this thread's connection to the database
+    Values are passed as parameters rather than written into the command
 
     Args:
-        command (string): sqlite3 command
+        command (string): sqlite3 command, with ? for each parameter
         database (string): database to use
+        parameters (tuple, optional): Values for the command's parameters
 
     Returns:
         sqlite3.Cursor : Results of sql command
     """
-    conn = sqlite3.connect(database)
-    cursor = conn.cursor()
-    output = cursor.execute(command)
+    conn = get_connection(database)
+    output = conn.execute(command, parameters)
     conn.commit()
     return output
 
@@ -0,0 +1,178 @@
+from argparse import ArgumentParser
+from time import perf_counter
+from board import CompactBoard, BOTTOM_MASK, BOARD_MASK, canonical_key, column_mask, winning_squares
+from auxiliary import Status, Save_Type
+from storage import get_connection, load_iter, revert_history
+
+class Tablebase:
+    """Exact scores of positions with at least min_stones stones, held in memory
+    so the search can probe it at every node
+    """
+
+    def __init__(self, scores : dict, min_stones : int):
+        """Constructor method for a tablebase
+
+        Args:
+            scores (dict): Solver score for each canonical key
+            min_stones (int): Fewest stones in a position the tablebase covers
+        """
+        self.scores = scores
+        self.min_stones = min_stones
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def probe(self, key : int) -> int:
+        """Looks up a position
+
+        Args:
+            key (int): Canonical key of the position
+
+        Returns:
+            int: Exact score for the player to move, or None if not in the tablebase
+        """
+        return self.scores.get(key)
+
+def load_tablebase(database : str, min_stones : int = 0) -> Tablebase:
+    """Loads the tablebase from the database into memory
+
+    Args:
+        database (str): Database to use
+        min_stones (int, optional): Only load positions with at least this many stones
+
+    Returns:
+        Tablebase: Loaded tablebase, or None if there are no positions to load
+    """
+    rows = get_connection(database).execute(
+        "SELECT positionKey, stones, score FROM tablebase WHERE stones >= ?", (min_stones,)).fetchall()
+    if not rows:
+        return None
+    ##Probes are only made where every position in a subtree could be covered
+    return Tablebase({key : score for key, stones, score in rows},
+        max(min_stones, min(stones for key, stones, score in rows)))
+
+def solve_subtree(current : int, mask : int, counter : int, scores : dict) -> int:
+    """Solves every position below one by full enumeration, without pruning,
+    so every position visited gets an exact score
+
+    Args:
+        current (int): Stones of the player to move
+        mask (int): All stones
+        counter (int): Number of moves played
+        scores (dict): Scores by canonical key, filled in as positions are solved
+
+    Returns:
+        int: Exact score of the position for the player to move
+    """
+    if counter == 42:
+        return 0 ##Full board without a win
+    key = canonical_key(current + mask)
+    score = scores.get(key)
+    if score is not None:
+        return score
+
+    possible = (mask + BOTTOM_MASK) & BOARD_MASK
+    if winning_squares(current, mask) & possible:
+        score = (43 - counter) // 2
+    else:
+        score = -22 ##Lower than any score
+        for col in range(7):
+            move = possible & column_mask(col)
+            if move:
+                score = max(score, -solve_subtree(current ^ mask, mask | move, counter + 1, scores))
+    scores[key] = score
+    return score
+
+def generate_tablebase(roots : list, min_stones : int, database : str) -> int:
+    """Solves every position reachable from the roots with at least min_stones stones,
+    and writes them to the database
+
+    Roots with fewer than min_stones stones are enumerated through every continuation
+    down to min_stones, so roots far below it take a very long time
+
+    Args:
+        roots (list): Move histories to enumerate from
+        min_stones (int): Fewest stones in a stored position
+        database (str): Database to use
+
+    Returns:
+        int: Number of positions stored
+    """
+    scores = {}
+    board = CompactBoard()
+
+    def visit():
+        if board.game_over() != Status.game_unfinished:
+            return
+        if board.get_counter() < min_stones:
+            for move in board.retrieve_valid_moves():
+                board.make_move(move)
+                visit()
+                board.undo_move()
+            return
+        counter = board.get_counter()
+        solve_subtree(board.get_bitboard(counter & 1), board.get_mask(), counter, scores)
+
+    for root in roots:
+        board.reset()
+        for move in root:
+            board.make_move(move)
+        visit()
+
+    conn = get_connection(database)
+    with conn: ##Commits once at the end, or rolls back every position on error
+        conn.executemany("INSERT OR REPLACE INTO tablebase (positionKey, stones, score) VALUES (?, ?, ?)",
+            ((key, stone_count(key), score) for key, score in scores.items()))
+    return len(scores)
+
+def stone_count(key : int) -> int:
+    """Number of stones in a position, from its key
+    Each column of a key holds 2**height - 1 plus the player to move's stones there,
+    less than 2**(height+1) - 1, so adding one gives a bit length of height + 1
+
+    Args:
+        key (int): Position key, canonical or not
+
+    Returns:
+        int: Number of stones
+    """
+    return sum(((key >> 7*col & 127) + 1).bit_length() - 1 for col in range(7))
+
+def roots_from_games(database : str, min_stones : int) -> list:
+    """Positions at min_stones stones reached in saved games, one of each mirror pair,
+    as the endgames actually played are the ones worth storing
+
+    Args:
+        database (str): Database holding the saved games
+        min_stones (int): Stones in each root
+
+    Returns:
+        list: Move histories of the roots
+    """
+    roots = {}
+    for game in load_iter(Save_Type.game, database):
+        moves = revert_history(game)
+        if len(moves) <= min_stones:
+            continue
+        board = CompactBoard()
+        for move in moves[:min_stones]:
+            board.make_move(move)
+        roots.setdefault(board.get_canonical_key()[0], moves[:min_stones])
+    return list(roots.values())
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description = "Generate the endgame tablebase")
+    parser.add_argument('--stones', type = int, default = 32, help = "fewest stones in a stored position")
+    parser.add_argument('--root', action = 'append', default = [],
+        help = "columns played from 0 as digits, enumerated instead of the saved games")
+    parser.add_argument('--database', default = "Connect4.db")
+    args = parser.parse_args()
+    if args.root:
+        roots = [[int(col) for col in root] for root in args.root]
+    else:
+        roots = roots_from_games(args.database, args.stones)
+    start = perf_counter()
+    count = generate_tablebase(roots, args.stones, args.database)
+    print(f"{count} positions from {len(roots)} roots written to {args.database} "
+        f"({perf_counter() - start:.1f}s)")
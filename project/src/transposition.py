@@ -0,0 +1,196 @@
+from array import array
+from multiprocessing import shared_memory
+from auxiliary import TT_Flag
+
+##Bytes used by one entry across all of the arrays
+##key 8, value 4, depth 1, flag 1, move 1, age 1
+ENTRY_SIZE = 16
+DEFAULT_MEMORY = 16 * 2**20 ##16 MiB
+
+class TranspositionTable:
+    """Fixed size table of previously searched positions
+    Stored as parallel arrays rather than a dictionary, so memory is capped
+    at construction and never grows during a search
+    """
+
+    def __init__(self, max_memory : int = DEFAULT_MEMORY):
+        """Constructor method for a transposition table
+
+        Args:
+            max_memory (int): Memory cap for the table in bytes
+        """
+        self._size = self.largest_prime(max(2, max_memory // ENTRY_SIZE))
+        self._age = 0
+        self.clear()
+
+    def clear(self):
+        """Empties every entry in the table
+        """
+        size = self._size
+        self._keys = array('Q', bytes(8*size))
+        self._values = array('i', bytes(4*size))
+        self._depths = array('b', bytes(size))
+        self._flags = array('b', bytes(size)) ##All entries start as TT_Flag.empty
+        self._moves = array('b', bytes(size))
+        self._ages = array('B', bytes(size))
+
+    def get_size(self) -> int:
+        """Get method for _size
+
+        Returns:
+            int: Number of entries the table can hold
+        """
+        return self._size
+
+    def new_search(self):
+        """Marks the start of a new search
+        Entries from older searches are replaced regardless of depth
+        """
+        self._age = (self._age + 1) & 255
+
+    def probe(self, key : int) -> tuple:
+        """Looks up a position in the table
+
+        Args:
+            key (int): Position key from Board.get_key
+
+        Returns:
+            tuple: (value, depth, flag, move) if found, otherwise None
+        """
+        index = key % self._size
+        if self._flags[index] == TT_Flag.empty or self._keys[index] != key:
+            return None
+        return (self._values[index], self._depths[index],
+            self._flags[index], self._moves[index])
+
+    def store(self, key : int, value : int, depth : int, flag : int, move : int):
+        """Stores a search result, using a depth-preferred replacement policy
+        An existing entry is only kept if it is from the current search,
+        for a different position, and was searched to a greater depth
+
+        Args:
+            key (int): Position key from Board.get_key
+            value (int): Evaluation of position
+            depth (int): Remaining depth the position was searched to
+            flag (int): TT_Flag describing the value as exact or a bound
+            move (int): Best move found, -1 if none
+        """
+        index = key % self._size
+        if self._flags[index] != TT_Flag.empty and self._keys[index] != key \
+                and self._ages[index] == self._age and self._depths[index] > depth:
+            return
+        self._keys[index] = key
+        self._values[index] = value
+        self._depths[index] = depth
+        self._flags[index] = flag
+        self._moves[index] = move
+        self._ages[index] = self._age
+
+    def close(self):
+        """Releases the table, nothing to do for a table in local memory
+        """
+        pass
+
+    def largest_prime(self, n : int) -> int:
+        """Finds the largest prime not greater than n
+        A prime table size spreads the structured position keys across the table
+
+        Args:
+            n (int): Upper limit
+
+        Returns:
+            int: Largest prime <= n
+        """
+        while n > 2:
+            if n % 2 != 0 and all(n % i != 0 for i in range(3, int(n**0.5) + 1, 2)):
+                return n
+            n -= 1
+        return 2
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """Transposition table held in shared memory, for use by several processes
+    Each entry is two 64-bit words, the packed data and the data XORed with the key.
+    Entries are written without locks, so a reader only trusts an entry
+    if the two words still agree with the key it is looking for
+    """
+
+    def __init__(self, max_memory : int = DEFAULT_MEMORY, name : str = None, size : int = None):
+        """Creates a new table, or attaches to an existing one by name
+
+        Args:
+            max_memory (int): Memory cap for a new table in bytes
+            name (str, optional): Shared memory block of an existing table
+            size (int, optional): Number of entries in the existing table
+        """
+        self._age = 0
+        if name is None:
+            self._size = self.largest_prime(max(2, max_memory // ENTRY_SIZE))
+            self._memory = shared_memory.SharedMemory(create = True, size = ENTRY_SIZE*self._size)
+            self._owner = True
+        else:
+            self._size = size
+            self._memory = shared_memory.SharedMemory(name = name)
+            self._owner = False
+        self._words = self._memory.buf.cast('Q')
+        if self._owner:
+            self.clear()
+
+    def __reduce__(self):
+        """Pickles as a reference to the shared block, so processes attach to it
+        """
+        return (SharedTranspositionTable, (0, self._memory.name, self._size))
+
+    def clear(self):
+        """Empties every entry in the table
+        """
+        self._words[:] = array('Q', bytes(ENTRY_SIZE*self._size))
+
+    def probe(self, key : int) -> tuple:
+        """Looks up a position in the table
+
+        Args:
+            key (int): Position key from Board.get_key
+
+        Returns:
+            tuple: (value, depth, flag, move) if found, otherwise None
+        """
+        index = 2*(key % self._size)
+        data = self._words[index+1]
+        ##Torn or overwritten entries fail the check
+        if self._words[index] ^ data != key:
+            return None
+        flag = (data >> 40) & 255
+        if flag == TT_Flag.empty:
+            return None
+        return ((data & 0xFFFFFFFF) - 2**31, (data >> 32) & 255,
+            flag, ((data >> 48) & 255) - 1)
+
+    def store(self, key : int, value : int, depth : int, flag : int, move : int):
+        """Stores a search result, using the same depth-preferred policy
+        as TranspositionTable
+
+        Args:
+            key (int): Position key from Board.get_key
+            value (int): Evaluation of position
+            depth (int): Remaining depth the position was searched to
+            flag (int): TT_Flag describing the value as exact or a bound
+            move (int): Best move found, -1 if none
+        """
+        index = 2*(key % self._size)
+        old = self._words[index+1]
+        if (old >> 40) & 255 != TT_Flag.empty and self._words[index] ^ old != key \
+                and old >> 56 == self._age and (old >> 32) & 255 > depth:
+            return
+        data = (value + 2**31) | (depth & 255) << 32 | flag << 40 \
+            | (move + 1) << 48 | self._age << 56
+        self._words[index+1] = data
+        self._words[index] = key ^ data
+
+    def close(self):
+        """Detaches from the shared block, removing it if this table created it
+        """
+        self._words.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()